@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def blacklist_cache_key(jti):
+    return f"auth:blacklisted:{jti}"
+
+
+def invalidate_user_cache(user_id):
+    """Drop the cached user, e.g. after it was saved or deleted"""
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that resolves the token's user through the cache.
+
+    The user is read from the database at most once per
+    ``AUTH_USER_CACHE_TIMEOUT`` seconds instead of on every request. Only the
+    user's id, active flag and the password digest tokens carry are cached,
+    never the password hash; the returned user loads its other fields when
+    they are first read. Saving or deleting a user drops its entry, and the
+    active and password checks run against the cached values.
+    """
+
+    def get_user(self, validated_token):
+        timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not timeout or user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        cached = cache.get(key)
+        if cached is None:
+            user = super().get_user(validated_token)
+            cache.set(
+                key,
+                {
+                    "pk": user.pk,
+                    "is_active": user.is_active,
+                    "password_digest": get_md5_hash_password(user.password),
+                },
+                timeout=timeout,
+            )
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not cached["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+            != cached["password_digest"]
+        ):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."), code="password_changed"
+            )
+        # The remaining fields are deferred and loaded on first access
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS, ["id", "is_active"], [cached["pk"], cached["is_active"]]
+        )
+
+
+class CachedRefreshToken(RefreshToken):
+    """Refresh token whose blacklist check is answered from the cache when it can.
+
+    Only blacklisted tokens are cached, until they expire: they can never
+    become valid again, so replays of a rotated or logged-out token are
+    rejected without a query. Tokens not found in the blacklist are always
+    checked against the database, so a token is unusable as soon as it is
+    blacklisted, whichever process did it.
+    """
+
+    def check_blacklist(self):
+        key = blacklist_cache_key(self.payload[api_settings.JTI_CLAIM])
+        if cache.get(key):
+            raise TokenError(_("Token is blacklisted"))
+        try:
+            super().check_blacklist()
+        except TokenError:
+            self.cache_blacklisted()
+            raise
+
+    def blacklist(self):
+        result = super().blacklist()
+        self.cache_blacklisted()
+        return result
+
+    def cache_blacklisted(self):
+        # Past its expiry the token is rejected anyway, so the entry can go
+        remaining = int(self.payload["exp"] - self.current_time.timestamp())
+        if remaining > 0:
+            cache.set(
+                blacklist_cache_key(self.payload[api_settings.JTI_CLAIM]),
+                True,
+                timeout=remaining,
+            )
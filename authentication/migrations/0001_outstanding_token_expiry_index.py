@@ -0,0 +1,26 @@
+from django.db import migrations
+
+# simplejwt does not index expires_at, which the prune command selects on
+INDEX_NAME = "token_blacklist_outstandingtoken_expires_idx"
+
+
+def create_expiry_index(apps, schema_editor):
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS "{INDEX_NAME}" '
+        'ON "token_blacklist_outstandingtoken" ("expires_at")'
+    )
+
+
+def drop_expiry_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX_NAME}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("token_blacklist", "0013_alter_blacklistedtoken_options_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_expiry_index, drop_expiry_index),
+    ]
@@ -1,3 +1,260 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+from rest_framework_simplejwt.tokens import RefreshToken
+from authentication.authentication import CachedJWTAuthentication, user_cache_key
+from invoice_management.testing import QueryBudgetMixin, query_budget
 
-# Create your tests here.
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=300)
+class CachedJWTAuthenticationTest(TestCase):
+    """Test cases for the cached JWT user lookup"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        access = RefreshToken.for_user(self.user).access_token
+        self.request = APIRequestFactory().get(
+            "/api/invoices/", HTTP_AUTHORIZATION=f"Bearer {access}"
+        )
+
+    def test_user_is_looked_up_once(self):
+        """Test that repeated requests resolve the user from the cache"""
+        authentication = CachedJWTAuthentication()
+        with self.assertNumQueries(1):
+            user, _ = authentication.authenticate(self.request)
+        with self.assertNumQueries(0):
+            cached_user, _ = authentication.authenticate(self.request)
+        self.assertEqual(user, self.user)
+        self.assertEqual(cached_user, self.user)
+
+    def test_user_changes_invalidate_the_cache(self):
+        """Test that saving or deleting a user drops the cached entry"""
+        authentication = CachedJWTAuthentication()
+        authentication.authenticate(self.request)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate(self.request)
+
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate(self.request)
+
+    def test_cache_holds_no_password_hash(self):
+        """Test that only the id and revocation stamps are cached"""
+        authentication = CachedJWTAuthentication()
+        authentication.authenticate(self.request)
+        cached = cache.get(user_cache_key(self.user.pk))
+        self.assertEqual(set(cached), {"pk", "is_active", "password_digest"})
+        self.assertNotIn(self.user.password, cached.values())
+
+        user, _ = authentication.authenticate(self.request)
+        # Fields other than the cached ones are loaded when first read
+        with self.assertNumQueries(1):
+            self.assertEqual(user.username, "testuser")
+
+
+class UncachedJWTAuthenticationTest(APITestCase):
+    """Test cases for the JWT user lookup without a shared cache"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_queryset_update_revokes_access(self):
+        """Test that deactivating a user with update() takes effect at once"""
+        self.assertEqual(self.client.get("/api/invoices/").status_code, 200)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.client.get("/api/invoices/").status_code, 401)
+
+
+class CachedBlacklistTest(APITestCase):
+    """Test cases for the cached refresh token blacklist check"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        response = self.client.post(
+            "/api/auth/login/",
+            {"username": "testuser", "password": "testpass123"},
+            format="json",
+        )
+        self.refresh = response.json()["refresh"]
+
+    def test_logged_out_token_is_rejected_from_cache(self):
+        """Test that a logged out refresh token is rejected without a query"""
+        response = self.client.post(
+            "/api/auth/logout/", {"refresh": self.refresh}, format="json"
+        )
+        self.assertEqual(response.status_code, 205)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                "/api/auth/refresh/", {"refresh": self.refresh}, format="json"
+            )
+        self.assertEqual(response.status_code, 401)
+
+    def test_rotated_token_cannot_be_reused(self):
+        """Test that refreshing blacklists the previous refresh token"""
+        response = self.client.post(
+            "/api/auth/refresh/", {"refresh": self.refresh}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()["refresh"], self.refresh)
+
+        response = self.client.post(
+            "/api/auth/refresh/", {"refresh": self.refresh}, format="json"
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class PruneTokenBlacklistTest(TestCase):
+    """Test cases for the prune_token_blacklist management command"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        now = timezone.now()
+        for i in range(5):
+            token = OutstandingToken.objects.create(
+                user=self.user,
+                jti=f"expired-{i}",
+                token="token",
+                expires_at=now - timedelta(hours=2),
+            )
+            if i % 2 == 0:
+                BlacklistedToken.objects.create(token=token)
+        OutstandingToken.objects.create(
+            user=self.user,
+            jti="live",
+            token="token",
+            expires_at=now + timedelta(days=1),
+        )
+
+    def test_expired_tokens_are_pruned_in_batches(self):
+        """Test that only expired tokens and their blacklist entries are deleted"""
+        stdout = StringIO()
+        call_command(
+            "prune_token_blacklist", "--batch-size", "2", "--sleep", "0", stdout=stdout
+        )
+
+        self.assertIn("Pruned 5 expired tokens in 3 batches", stdout.getvalue())
+        self.assertIn("outstanding=6 blacklisted=3", stdout.getvalue())
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)), ["live"]
+        )
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_max_batches_and_grace_period(self):
+        """Test that --max-batches and --grace-hours limit the deletion"""
+        call_command(
+            "prune_token_blacklist",
+            "--batch-size",
+            "2",
+            "--sleep",
+            "0",
+            "--max-batches",
+            "1",
+            stdout=StringIO(),
+        )
+        self.assertEqual(OutstandingToken.objects.count(), 4)
+
+        call_command("prune_token_blacklist", "--grace-hours", "3", stdout=StringIO())
+        self.assertEqual(OutstandingToken.objects.count(), 4)
+
+
+class AuthenticationQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """Test cases for the query budget of every authentication endpoint"""
+
+    urlconf = "authentication.urls"
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.users = []
+
+    def populate(self, size):
+        """Add users with ``size`` refresh tokens each, up to ``size`` users"""
+        while len(self.users) < size:
+            user = User.objects.create_user(
+                username=f"user{len(self.users)}", password="testpass123"
+            )
+            for _ in range(size):
+                RefreshToken.for_user(user)
+            self.users.append(user)
+        self.refresh = str(RefreshToken.for_user(self.user))
+
+    @query_budget("auth_signup", queries=4, db_time=0.5)
+    def test_signup(self, size):
+        """Test the query budget of signing up"""
+        return self.client.post(
+            "/api/auth/signup/",
+            {
+                "username": f"newuser{size}",
+                "password": "Str0ng-passw0rd",
+                "password2": "Str0ng-passw0rd",
+                "email": f"newuser{size}@example.com",
+                "first_name": "New",
+                "last_name": "User",
+            },
+            format="json",
+        )
+
+    @query_budget("token_obtain_pair", queries=2, db_time=0.5)
+    def test_login(self, size):
+        """Test the query budget of logging in"""
+        return self.client.post(
+            "/api/auth/login/",
+            {"username": "testuser", "password": "testpass123"},
+            format="json",
+        )
+
+    @query_budget("token_refresh", queries=13, db_time=0.5)
+    def test_refresh(self, size):
+        """Test the query budget of refreshing a token"""
+        return self.client.post(
+            "/api/auth/refresh/", {"refresh": self.refresh}, format="json"
+        )
+
+    @query_budget("token_verify", queries=1, db_time=0.5)
+    def test_verify(self, size):
+        """Test the query budget of verifying a token"""
+        return self.client.post(
+            "/api/auth/verify/", {"token": self.refresh}, format="json"
+        )
+
+    @query_budget("auth_logout", queries=7, db_time=0.5)
+    def test_logout(self, size):
+        """Test the query budget of logging out"""
+        return self.client.post(
+            "/api/auth/logout/", {"refresh": self.refresh}, format="json"
+        )
@@ -166,6 +166,7 @@ export function EditInvoiceDialog({
       customer_name: customerName,
       customer_email: customerEmail,
       items: items.map((item) => ({
+        id: item.id,
         description: item.description,
         quantity: parseFloat(item.quantity) || 0,
         unit_price: item.unit_price,
@@ -1,4 +1,9 @@
-import { Invoice, Transaction, CreateInvoiceRequest } from "@/types/invoice";
+import {
+  Invoice,
+  Transaction,
+  CreateInvoiceRequest,
+  PaginatedResponse,
+} from "@/types/invoice";
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || "http://localhost:8000";
 
@@ -15,19 +20,36 @@ const getAuthHeaders = () => {
   };
 };
 
-// API Service - Django backend integration
-export const invoiceApi = {
-  // GET /api/invoices/
-  async getInvoices(): Promise<Invoice[]> {
-    const response = await fetch(`${API_BASE_URL}/api/invoices/`, {
+// Helper to walk every page of a cursor-paginated list endpoint
+const fetchAllPages = async <T>(url: string, errorMessage: string): Promise<T[]> => {
+  const results: T[] = [];
+  let next: string | null = url;
+
+  while (next) {
+    const response = await fetch(next, {
       headers: getAuthHeaders(),
     });
 
     if (!response.ok) {
-      throw new Error("Failed to fetch invoices");
+      throw new Error(errorMessage);
     }
 
-    return response.json();
+    const page: PaginatedResponse<T> = await response.json();
+    results.push(...page.results);
+    next = page.next;
+  }
+
+  return results;
+};
+
+// API Service - Django backend integration
+export const invoiceApi = {
+  // GET /api/invoices/
+  async getInvoices(): Promise<Invoice[]> {
+    return fetchAllPages<Invoice>(
+      `${API_BASE_URL}/api/invoices/`,
+      "Failed to fetch invoices"
+    );
   },
 
   // GET /api/invoices/:id/
@@ -120,15 +142,10 @@ export const invoiceApi = {
 
   // GET /api/transactions/
   async getAllTransactions(): Promise<Transaction[]> {
-    const response = await fetch(`${API_BASE_URL}/api/transactions/`, {
-      headers: getAuthHeaders(),
-    });
-
-    if (!response.ok) {
-      throw new Error("Failed to fetch transactions");
-    }
-
-    return response.json();
+    return fetchAllPages<Transaction>(
+      `${API_BASE_URL}/api/transactions/`,
+      "Failed to fetch transactions"
+    );
   },
 
   // GET /api/transactions/:id/
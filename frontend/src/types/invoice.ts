@@ -30,11 +30,18 @@ export interface Invoice {
   transactions: Transaction[];
 }
 
+export interface PaginatedResponse<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
 export interface CreateInvoiceRequest {
   reference_number: string;
   customer_name: string;
   customer_email: string;
   items: {
+    id?: number;
     description: string;
     quantity: number;
     unit_price: string;
@@ -0,0 +1,209 @@
+"""In-process request metrics, exposed in the Prometheus text format.
+
+``PerformanceMiddleware`` starts a ``RequestStats`` for each request. The
+database execute wrapper and the timed serializers add to the stats of the
+request they run in, found through a context variable so that it also
+reaches the threads async views run their queries in. When the request
+ends its stats are added to the registry, which ``/metrics/`` renders.
+
+Metrics are kept per process: with several workers, scrape each of them.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+from rest_framework import serializers
+
+# Upper bounds of the request latency histogram, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Upper bounds of the queries-per-request histogram
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+current_stats = ContextVar("current_stats", default=None)
+
+
+class RequestStats:
+    """What a single request spent its time on"""
+
+    __slots__ = ("query_count", "query_seconds", "serializer_seconds")
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.serializer_seconds = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting and timing the current request's queries"""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.query_count += 1
+        stats.query_seconds += time.perf_counter() - started
+
+
+def install_query_recorder(connection, **kwargs):
+    """Add ``record_query`` to a connection; connected to ``connection_created``"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedSerializerMixin:
+    """Adds the time spent building ``.data`` to the request's serializer time.
+
+    Set ``Meta.list_serializer_class`` to ``TimedListSerializer`` to time
+    ``many=True`` serializers as well.
+    """
+
+    @property
+    def data(self):
+        return timed_data(super())
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+def timed_data(parent):
+    stats = current_stats.get()
+    if stats is None:
+        return parent.data
+    started = time.perf_counter()
+    try:
+        return parent.data
+    finally:
+        stats.serializer_seconds += time.perf_counter() - started
+
+
+class Histogram:
+    """Bucket counts, sum and count of observations per label set"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+class Summary:
+    """Sum and count of observations per label set"""
+
+    def __init__(self):
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0, 0]
+        series[0] += value
+        series[1] += 1
+
+
+class Registry:
+    """The request metrics of this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_seconds = Summary()
+        self.serializer_seconds = Summary()
+        self.response_bytes = Summary()
+
+    def record(self, view, method, status, seconds, stats, response_bytes):
+        labels = (view, method)
+        with self.lock:
+            key = (view, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.observe(labels, seconds)
+            self.queries.observe(labels, stats.query_count)
+            self.query_seconds.observe(labels, stats.query_seconds)
+            self.serializer_seconds.observe(labels, stats.serializer_seconds)
+            if response_bytes is not None:
+                self.response_bytes.observe(labels, response_bytes)
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            lines += [
+                "# HELP http_requests_total Requests by view, method and status",
+                "# TYPE http_requests_total counter",
+            ]
+            for (view, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f"http_requests_total{{{format_labels(view, method)},"
+                    f'status="{status}"}} {count}'
+                )
+            lines += render_histogram(
+                "http_request_duration_seconds",
+                "Time to produce the response, in seconds",
+                self.latency,
+            )
+            lines += render_histogram(
+                "http_request_db_queries",
+                "Database queries per request",
+                self.queries,
+            )
+            lines += render_summary(
+                "http_request_db_duration_seconds",
+                "Time spent in database queries, in seconds",
+                self.query_seconds,
+            )
+            lines += render_summary(
+                "http_request_serializer_duration_seconds",
+                "Time spent building serializer data, in seconds",
+                self.serializer_seconds,
+            )
+            lines += render_summary(
+                "http_response_size_bytes",
+                "Size of non-streaming response bodies, in bytes",
+                self.response_bytes,
+            )
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(view, method):
+    view = view.replace("\\", "\\\\").replace('"', '\\"')
+    return f'view="{view}",method="{method}"'
+
+
+def render_histogram(name, help_text, histogram):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (view, method), series in sorted(histogram.series.items()):
+        labels = format_labels(view, method)
+        for bound, count in zip(histogram.buckets, series):
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+        lines.append(f"{name}_sum{{{labels}}} {series[-2]}")
+        lines.append(f"{name}_count{{{labels}}} {series[-1]}")
+    return lines
+
+
+def render_summary(name, help_text, summary):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+    for (view, method), (total, count) in sorted(summary.series.items()):
+        labels = format_labels(view, method)
+        lines.append(f"{name}_sum{{{labels}}} {total}")
+        lines.append(f"{name}_count{{{labels}}} {count}")
+    return lines
+
+
+registry = Registry()
@@ -0,0 +1,70 @@
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from .metrics import RequestStats, current_stats, install_query_recorder, registry
+
+
+class PerformanceMiddleware:
+    """Record latency, database and serializer time and size of each response.
+
+    The numbers are added to the metrics served at ``/metrics/``, labelled
+    with the URL name of the view. With ``settings.METRICS_DEBUG_HEADERS``
+    the response also carries them in ``X-DB-Query-Count`` and
+    ``Server-Timing`` headers. The overhead is a few timer reads per
+    request and per query.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(install_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats, started)
+
+    def finish(self, request, response, stats, started):
+        seconds = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match is not None else "unmatched"
+        size = None if response.streaming else len(response.content)
+        registry.record(
+            view, request.method, response.status_code, seconds, stats, size
+        )
+
+        if settings.METRICS_DEBUG_HEADERS:
+            response["X-DB-Query-Count"] = str(stats.query_count)
+            response["Server-Timing"] = (
+                f'db;desc="{stats.query_count} queries";'
+                f"dur={stats.query_seconds * 1000:.1f}, "
+                f"serializer;dur={stats.serializer_seconds * 1000:.1f}, "
+                f"total;dur={seconds * 1000:.1f}"
+            )
+        return response
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from datetime import timedelta
 from pathlib import Path
 import os
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,6 +51,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "rest_framework",
+    "adrf",
     "rest_framework_simplejwt.token_blacklist",
     "drf_yasg",
     "corsheaders",
@@ -59,6 +61,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "invoice_management.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -67,6 +70,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "invoices.middleware.IdempotencyKeyMiddleware",
 ]
 
 ROOT_URLCONF = "invoice_management.urls"
@@ -104,9 +108,81 @@ DATABASES = {
             "sslmode": "require",
             "channel_binding": "require",
         },
+        # Seconds a connection stays open for reuse by later requests, which
+        # then skip the TCP and TLS handshakes and authentication; 0 closes
+        # it after each request and "none" never does. Under ASGI each
+        # request may run in a different thread, so use DB_POOL there instead
+        "CONN_MAX_AGE": (
+            None
+            if os.getenv("DB_CONN_MAX_AGE", "60").lower() == "none"
+            else int(os.getenv("DB_CONN_MAX_AGE", 60))
+        ),
+        # Check that a reused connection is still alive before the first
+        # query of a request, instead of failing that request if it is not
+        "CONN_HEALTH_CHECKS": (
+            os.getenv("DB_CONN_HEALTH_CHECKS", "True").lower() == "true"
+        ),
     }
 }
 
+# Share a psycopg 3 connection pool between the threads of each process,
+# which needs `pip install "psycopg[binary,pool]"`. Connections go back to
+# the pool at the end of each request, so CONN_MAX_AGE does not apply
+if os.getenv("DB_POOL", "False").lower() == "true":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+        # Seconds a request waits for a free connection before failing
+        "timeout": int(os.getenv("DB_POOL_TIMEOUT", 10)),
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Shared Redis cache when REDIS_URL is set, per-process memory otherwise
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Closed report periods never change, so they can be cached for long
+TRANSACTION_REPORT_CACHE_TIMEOUT = int(
+    os.getenv("TRANSACTION_REPORT_CACHE_TIMEOUT", 60 * 60 * 24)
+)
+
+# Serialized invoice details are revalidated against their ETag on every
+# read, so a stale entry is never served; 0 disables the payload cache
+INVOICE_DETAIL_CACHE_TIMEOUT = int(os.getenv("INVOICE_DETAIL_CACHE_TIMEOUT", 60 * 5))
+
+# Responses to requests sent with an Idempotency-Key header are replayed
+# for retries with the same key for this many seconds
+IDEMPOTENCY_KEY_TIMEOUT = int(os.getenv("IDEMPOTENCY_KEY_TIMEOUT", 60 * 60 * 24))
+
+# Add each response's query count and timings to its headers
+METRICS_DEBUG_HEADERS = os.getenv("METRICS_DEBUG_HEADERS", "false").lower() == "true"
+
+# Bearer token a metrics scraper sends to read /metrics/; without it only
+# staff users signed in to the admin can read them
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# POST endpoints whose responses IdempotencyKeyMiddleware replays
+IDEMPOTENCY_KEY_PATHS = [
+    "/api/invoices/",
+    "/api/invoices/bulk/",
+    "/api/invoices/bulk-status/",
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -152,7 +228,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "authentication.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -165,8 +241,17 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "BLACKLIST_AFTER_ROTATION": True,
     "ROTATE_REFRESH_TOKENS": True,
+    "TOKEN_REFRESH_SERIALIZER": "authentication.serializers.CachedTokenRefreshSerializer",
 }
 
+# Users resolved from access tokens are cached for this many seconds;
+# saving or deleting a user drops its entry, 0 disables the cache. Only on
+# by default with the shared Redis cache: a per-process cache would keep a
+# deactivated user authenticated in every process but the one that saved it
+AUTH_USER_CACHE_TIMEOUT = int(
+    os.getenv("AUTH_USER_CACHE_TIMEOUT", 60 * 5 if os.getenv("REDIS_URL") else 0)
+)
+
 # drf-yasg settings
 SWAGGER_SETTINGS = {
     "SECURITY_DEFINITIONS": {
@@ -201,6 +286,10 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+
+CORS_EXPOSE_HEADERS = ["idempotent-replayed"]
+
 # CSRF Trusted Origins
 CSRF_TRUSTED_ORIGINS = [
     "https://invoice.loca.lt",
@@ -0,0 +1,215 @@
+"""Query budgets for API tests.
+
+Mix ``QueryBudgetMixin`` into a test case, implement ``populate`` and
+declare one test per endpoint with the ``query_budget`` decorator::
+
+    class InvoiceQueryBudgetTest(QueryBudgetMixin, APITestCase):
+        urlconf = "invoices.urls"
+
+        def populate(self, size):
+            ...
+
+        @query_budget("invoice-list-create", queries=2, db_time=0.2)
+        def test_list(self, size):
+            return self.client.get("/api/invoices/")
+
+The decorated method sends one request and is run once per fixture size.
+The test fails when a run exceeds the budget or when the number of queries
+grows with the size of the data, the signature of an N+1 query, and reports
+the queries that multiplied with where in the project they were made.
+Every named URL of ``urlconf`` must have a budget.
+"""
+
+import functools
+import re
+import time
+import traceback
+from collections import Counter, namedtuple
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+from . import metrics
+
+# Execute wrappers, whose frames say nothing about where a query comes from
+WRAPPER_FILES = {__file__, metrics.__file__}
+
+RecordedQuery = namedtuple("RecordedQuery", ["sql", "seconds", "origin"])
+
+# Fixture sizes each budgeted request is measured at
+DEFAULT_SIZES = (1, 4, 8)
+
+# Literal values are replaced so that queries differing only in them match
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def query_origin():
+    """Return the innermost project frames of the current stack, outermost first"""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and frame.filename not in WRAPPER_FILES
+        and "site-packages" not in frame.filename
+    ]
+    return [
+        f"{Path(frame.filename).relative_to(base_dir)}:{frame.lineno} in {frame.name}"
+        for frame in frames[-3:]
+    ]
+
+
+class QueryRecorder:
+    """Context manager recording the SQL, duration and origin of each query"""
+
+    def __init__(self, using="default"):
+        self.connection = connections[using]
+        self.queries = []
+
+    def __enter__(self):
+        self.connection.execute_wrappers.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        # Not popped: the first request may append wrappers of its own
+        self.connection.execute_wrappers.remove(self)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                RecordedQuery(sql, time.perf_counter() - started, query_origin())
+            )
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def seconds(self):
+        return sum(query.seconds for query in self.queries)
+
+
+def query_budget(url_name, queries, db_time=None, sizes=DEFAULT_SIZES):
+    """Declare the most queries and DB seconds a request to ``url_name`` may take"""
+
+    def decorator(method):
+        @functools.wraps(method)
+        def test(self):
+            self.check_query_budget(method, queries, db_time, sizes)
+
+        test.query_budget_url = url_name
+        return test
+
+    return decorator
+
+
+def describe_growth(smallest, largest):
+    """List the queries made more often with the larger fixture, with origins"""
+
+    def shapes(recorder):
+        return Counter(LITERALS.sub("?", query.sql) for query in recorder.queries)
+
+    before, after = shapes(smallest), shapes(largest)
+    lines = []
+    for shape, count in after.items():
+        if count <= before[shape]:
+            continue
+        lines.append(f"  {before[shape]} -> {count} x {shape}")
+        origin = next(
+            query.origin
+            for query in largest.queries
+            if LITERALS.sub("?", query.sql) == shape
+        )
+        lines.extend(f"      {frame}" for frame in origin)
+    return lines
+
+
+def url_names(urlconf):
+    """Return the names of the URL patterns of ``urlconf``, recursively"""
+    names = set()
+    patterns = list(get_resolver(urlconf).url_patterns)
+    while patterns:
+        pattern = patterns.pop()
+        if isinstance(pattern, URLResolver):
+            patterns.extend(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class QueryBudgetMixin:
+    """Per-endpoint query budget tests for a ``TestCase``.
+
+    A mixin rather than a ``TestCase`` so that test discovery does not
+    collect it wherever it is imported.
+    """
+
+    # The URL configuration whose named URLs must all have a budget
+    urlconf = None
+
+    def populate(self, size):
+        """Bring the test data up to ``size``; called with increasing sizes"""
+        raise NotImplementedError
+
+    def check_query_budget(self, send_request, queries, db_time, sizes):
+        runs = []
+        for size in sizes:
+            self.populate(size)
+            # Measure every size with cold caches so that the runs compare
+            cache.clear()
+            with QueryRecorder() as recorder:
+                response = send_request(self, size)
+                # Streamed bodies run their queries as they are consumed
+                body = (
+                    b"".join(response.streaming_content)
+                    if response.streaming
+                    else response.content
+                )
+            self.assertLess(
+                response.status_code,
+                400,
+                f"Request failed with fixture size {size}: {body[:500]}",
+            )
+            runs.append((size, recorder))
+
+        problems = []
+        for size, recorder in runs:
+            if recorder.count > queries:
+                problems.append(
+                    f"{recorder.count} queries with fixture size {size}, "
+                    f"budget is {queries}"
+                )
+            if db_time is not None and recorder.seconds > db_time:
+                problems.append(
+                    f"{recorder.seconds:.3f}s in the database with fixture size "
+                    f"{size}, budget is {db_time}s"
+                )
+        (smallest_size, smallest), (largest_size, largest) = runs[0], runs[-1]
+        if largest.count > smallest.count:
+            problems.append(
+                f"Query count grows with the data: {smallest.count} with fixture "
+                f"size {smallest_size}, {largest.count} with {largest_size}"
+            )
+            problems.extend(describe_growth(smallest, largest))
+        elif problems:
+            problems.append("Queries with the largest fixture:")
+            for query in largest.queries:
+                problems.append(f"  {query.sql}")
+                problems.extend(f"      {frame}" for frame in query.origin)
+        if problems:
+            self.fail("\n".join(problems))
+
+    def test_every_url_has_a_budget(self):
+        """Test that each named URL of ``urlconf`` has a query budget"""
+        self.assertIsNotNone(self.urlconf, "Set urlconf to the budgeted URLs")
+        budgeted = {
+            getattr(getattr(self, name), "query_budget_url", None)
+            for name in dir(self)
+            if name.startswith("test")
+        }
+        missing = url_names(self.urlconf) - budgeted
+        self.assertFalse(missing, f"URLs without a query budget: {sorted(missing)}")
@@ -0,0 +1,148 @@
+"""
+Tests for the project-wide middleware and endpoints.
+"""
+
+import unittest
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+from invoices.models import Invoice, InvoiceItem
+from invoice_management.metrics import registry
+from invoice_management.testing import (
+    QueryBudgetMixin,
+    QueryRecorder,
+    describe_growth,
+)
+
+
+class PerformanceMiddlewareTest(APITestCase):
+    """Test cases for request metrics and the /metrics/ endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        registry.reset()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        invoice = Invoice.objects.create(
+            reference_number="INV-P001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            total_amount=10.00,
+            created_by=self.user,
+        )
+        InvoiceItem.objects.create(
+            invoice=invoice, description="Item 1", quantity=1, unit_price=10.00
+        )
+
+    @override_settings(METRICS_DEBUG_HEADERS=True)
+    def test_debug_headers_report_queries(self):
+        """Test that the response headers carry the query count and timings"""
+        with self.assertNumQueries(2) as queries:
+            response = self.client.get("/api/invoices/")
+        self.assertEqual(response["X-DB-Query-Count"], str(len(queries)))
+        self.assertIn('db;desc="2 queries"', response["Server-Timing"])
+        self.assertIn("serializer;dur=", response["Server-Timing"])
+
+    @override_settings(METRICS_DEBUG_HEADERS=False, METRICS_TOKEN="scrape-token")
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        """Test that requests are counted and exposed per view"""
+        response = self.client.get("/api/invoices/")
+        self.assertFalse(response.has_header("X-DB-Query-Count"))
+        self.client.get("/api/async/invoices/")
+
+        response = self.client.get(
+            "/metrics/", HTTP_AUTHORIZATION="Bearer scrape-token"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        text = response.content.decode()
+        self.assertIn(
+            'http_requests_total{view="invoice-list-create",method="GET",'
+            'status="200"} 1',
+            text,
+        )
+        # The async view's queries, run in a worker thread, are counted too
+        self.assertIn(
+            'http_request_db_queries_bucket{view="async-invoice-list",'
+            'method="GET",le="1"} 0',
+            text,
+        )
+        self.assertIn(
+            'http_request_db_queries_bucket{view="async-invoice-list",'
+            'method="GET",le="2"} 1',
+            text,
+        )
+        self.assertIn(
+            'http_request_db_queries_bucket{view="invoice-list-create",'
+            'method="GET",le="2"} 1',
+            text,
+        )
+        self.assertIn("http_request_serializer_duration_seconds_sum", text)
+        self.assertIn("http_response_size_bytes_sum", text)
+
+    @override_settings(METRICS_TOKEN="scrape-token")
+    def test_metrics_endpoint_needs_the_token_or_staff(self):
+        """Test that only the scraper's token or a staff user reads metrics"""
+        for authorization in (None, "Bearer wrong-token", "scrape-token"):
+            headers = {"HTTP_AUTHORIZATION": authorization} if authorization else {}
+            response = self.client.get("/metrics/", **headers)
+            self.assertEqual(response.status_code, 403, authorization)
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get("/metrics/").status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_empty_token_grants_nothing(self):
+        """Test that an unset token does not let an empty bearer through"""
+        response = self.client.get("/metrics/", HTTP_AUTHORIZATION="Bearer ")
+        self.assertEqual(response.status_code, 403)
+
+
+class QueryRecorderTest(TestCase):
+    """Test cases for the query recorder behind the query budgets"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="testpass123")
+            for i in range(3)
+        ]
+
+    def lookup_users(self, count):
+        """Fetch ``count`` users one query at a time"""
+        for user in self.users[:count]:
+            User.objects.get(pk=user.pk)
+
+    def test_growth_is_reported_with_its_origin(self):
+        """Test that queries repeated per row are listed with where they ran"""
+        with QueryRecorder() as smallest:
+            self.lookup_users(1)
+        with QueryRecorder() as largest:
+            self.lookup_users(3)
+
+        self.assertEqual((smallest.count, largest.count), (1, 3))
+        self.assertGreaterEqual(largest.seconds, 0)
+        lines = describe_growth(smallest, largest)
+        self.assertIn("1 -> 3 x SELECT", lines[0])
+        self.assertTrue(
+            any("invoice_management/tests.py" in line for line in lines[1:]),
+            lines,
+        )
+        self.assertIn("in lookup_users", lines[-1])
+
+    def test_missing_urlconf_fails_the_coverage_check(self):
+        """Test that budget tests without a urlconf fail instead of passing"""
+
+        class UnconfiguredBudgetTest(QueryBudgetMixin, TestCase):
+            pass
+
+        result = unittest.TestResult()
+        UnconfiguredBudgetTest("test_every_url_has_a_budget").run(result)
+        self.assertEqual(len(result.failures), 1)
+        self.assertIn("Set urlconf", result.failures[0][1])
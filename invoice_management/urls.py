@@ -40,7 +40,11 @@ urlpatterns = [
     path("api/auth/", include("authentication.urls")),
     path("api/invoices/", include("invoices.urls")),
     path("api/transactions/", include("transactions.urls")),
+    # Async versions of the read and status endpoints, for ASGI deployments
+    path("api/async/invoices/", include("invoices.async_urls")),
+    path("api/async/transactions/", include("transactions.async_urls")),
     path("health/", views.health_check, name="health_check"),
+    path("metrics/", views.metrics, name="metrics"),
     re_path(
         r"^swagger(?P<format>\.json|\.yaml)$",
         schema_view.without_ui(cache_timeout=0),
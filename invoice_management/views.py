@@ -1,7 +1,10 @@
-from django.http import JsonResponse
+import hmac
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 import logging
+from .metrics import registry
 
 logger = logging.getLogger(__name__)
 
@@ -22,3 +25,21 @@ def health_check(request):
             {"status": "unhealthy", "message": "Application is experiencing issues"},
             status=500,
         )
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Request metrics of this process in the Prometheus text format.
+
+    Readable with ``Authorization: Bearer <METRICS_TOKEN>`` or by staff users.
+    """
+    authorization = request.headers.get("Authorization", "")
+    has_token = bool(settings.METRICS_TOKEN) and hmac.compare_digest(
+        authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()
+    )
+    if not has_token and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,5 +1,13 @@
 from django.contrib import admin
-from .models import Invoice, InvoiceItem
+from .models import Invoice, InvoiceItem, InvoiceSummary
+from .caching import invalidate_invoice_cache
+from transactions.reports import invalidate_report_cache
+
+
+class InvoiceItemInline(admin.TabularInline):
+    model = InvoiceItem
+    extra = 0
+    readonly_fields = ("total_price",)
 
 
 @admin.register(Invoice)
@@ -14,9 +22,82 @@ class InvoiceAdmin(admin.ModelAdmin):
     list_filter = ("status", "created_at")
     search_fields = ("reference_number", "customer_name", "customer_email")
     readonly_fields = ("created_at", "updated_at")
+    inlines = [InvoiceItemInline]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Admin edits bypass the API, so apply them to the summary here
+        if not change:
+            InvoiceSummary.record_invoices([obj])
+        elif form.initial["created_by"] == obj.created_by_id:
+            InvoiceSummary.record_change(
+                obj.created_by_id,
+                form.initial["status"],
+                form.initial["total_amount"],
+                obj.status,
+                obj.total_amount,
+            )
+        else:
+            # Moved to another user: out of the old owner's summary
+            previous = Invoice(
+                created_by_id=form.initial["created_by"],
+                status=form.initial["status"],
+                total_amount=form.initial["total_amount"],
+            )
+            InvoiceSummary.record_invoices([previous], sign=-1)
+            InvoiceSummary.record_invoices([obj])
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Items edited inline bypass the API, so re-aggregate the total
+        form.instance.calculate_total()
+        invalidate_invoice_cache(form.instance.pk)
+
+    def delete_model(self, request, obj):
+        pk = obj.pk
+        super().delete_model(request, obj)
+        InvoiceSummary.record_invoices([obj], sign=-1)
+        invalidate_invoice_cache(pk)
+        # Deleting an invoice deletes its transactions
+        invalidate_report_cache()
+
+    def delete_queryset(self, request, queryset):
+        invoices = list(queryset)
+        super().delete_queryset(request, queryset)
+        InvoiceSummary.record_invoices(invoices, sign=-1)
+        invalidate_invoice_cache(*(invoice.pk for invoice in invoices))
+        invalidate_report_cache()
 
 
 @admin.register(InvoiceItem)
 class InvoiceItemAdmin(admin.ModelAdmin):
     list_display = ("description", "invoice", "quantity", "unit_price", "total_price")
     list_filter = ("invoice",)
+
+    def save_model(self, request, obj, form, change):
+        previous_invoice_id = form.initial.get("invoice")
+        super().save_model(request, obj, form, change)
+        obj.invoice.calculate_total()
+        # Moving an item also changes the total of the invoice it left
+        if previous_invoice_id and previous_invoice_id != obj.invoice_id:
+            Invoice.objects.get(pk=previous_invoice_id).calculate_total()
+        invalidate_invoice_cache(obj.invoice_id, previous_invoice_id)
+
+    def delete_model(self, request, obj):
+        invoice = obj.invoice
+        super().delete_model(request, obj)
+        invoice.calculate_total()
+        invalidate_invoice_cache(invoice.pk)
+
+    def delete_queryset(self, request, queryset):
+        invoices = list(Invoice.objects.filter(items__in=queryset).distinct())
+        super().delete_queryset(request, queryset)
+        for invoice in invoices:
+            invoice.calculate_total()
+        invalidate_invoice_cache(*(invoice.pk for invoice in invoices))
+
+
+@admin.register(InvoiceSummary)
+class InvoiceSummaryAdmin(admin.ModelAdmin):
+    list_display = ("created_by", "status", "invoice_count", "total_amount")
+    list_filter = ("status",)
@@ -0,0 +1,25 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path(
+        "",
+        async_views.AsyncInvoiceListView.as_view(),
+        name="async-invoice-list",
+    ),
+    path(
+        "<int:pk>/",
+        async_views.AsyncInvoiceDetailView.as_view(),
+        name="async-invoice-detail",
+    ),
+    path(
+        "<int:pk>/mark-paid/",
+        async_views.amark_invoice_paid,
+        name="async-invoice-mark-paid",
+    ),
+    path(
+        "<int:pk>/mark-pending/",
+        async_views.amark_invoice_pending,
+        name="async-invoice-mark-pending",
+    ),
+]
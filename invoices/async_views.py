@@ -0,0 +1,114 @@
+"""Async versions of the invoice read and status endpoints.
+
+They are mounted under ``/api/async/invoices/`` and behave like their
+synchronous counterparts in ``views.py``. Served by an ASGI server
+(``uvicorn invoice_management.asgi:application``), a request waiting on the
+database or on a slow client does not hold a worker thread.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from adrf import generics
+from adrf.decorators import api_view
+from adrf.generics import aget_object_or_404
+from rest_framework import status
+from rest_framework.decorators import permission_classes
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .caching import (
+    acache_detail,
+    aget_cached_detail,
+    ainvalidate_invoice_cache,
+    ainvoice_etag,
+    etag_matches,
+)
+from .filters import InvoiceFilterBackend
+from .idempotency import aget_stored_response, astore_response, idempotency_key
+from .models import Invoice
+from .pagination import InvoiceCursorPagination
+from .serializers import InvoiceSerializer
+from .transitions import transition_invoice
+from .views import InvoiceRowsMixin
+
+
+class AsyncInvoiceListView(InvoiceRowsMixin, generics.ListAPIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = InvoiceCursorPagination
+    filter_backends = [InvoiceFilterBackend, OrderingFilter]
+    ordering_fields = ["created_at", "total_amount", "reference_number"]
+    ordering = ["-created_at", "id"]
+
+    def get_queryset(self):
+        # Return only invoices created by the current user, as plain rows;
+        # the serializer fetches the items of a page in a single extra query
+        return self.select_rows(Invoice.objects.filter(created_by=self.request.user))
+
+
+class AsyncInvoiceDetailView(generics.RetrieveAPIView):
+    serializer_class = InvoiceSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        # Return only invoices created by the current user
+        return Invoice.objects.filter(created_by=self.request.user)
+
+    async def get(self, request, pk):
+        etag = await ainvoice_etag(self.get_queryset(), pk)
+        if etag is None:
+            raise Http404
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        data = await aget_cached_detail(pk, etag)
+        if data is None:
+            # The items are prefetched, so serializing does not query
+            invoice = await aget_object_or_404(
+                self.get_queryset().prefetch_related("items"), pk=pk
+            )
+            data = self.get_serializer(invoice).data
+            await acache_detail(pk, etag, data)
+        return Response(data, headers={"ETag": etag})
+
+
+async def aset_invoice_status(request, pk, new_status):
+    """Async version of ``views.set_invoice_status``"""
+    key = idempotency_key(request)
+    scope = f"invoice-status:{pk}:{new_status}"
+    if key is not None:
+        stored = await aget_stored_response(request.user.pk, scope, key)
+        if stored is not None:
+            return Response(stored, headers={"Idempotent-Replayed": "true"})
+
+    queryset = Invoice.objects.filter(created_by=request.user)
+    try:
+        # The transition runs in a transaction, which the async ORM cannot open
+        invoice, old_status = await sync_to_async(transition_invoice)(
+            queryset, pk, new_status
+        )
+    except Invoice.DoesNotExist:
+        raise Http404
+    if old_status is not None:
+        await ainvalidate_invoice_cache(invoice.pk)
+    elif invoice.status != new_status:
+        return Response(
+            {"error": f"A {invoice.status} invoice cannot be marked {new_status}"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    data = InvoiceSerializer(invoice).data
+    if key is not None:
+        await astore_response(request.user.pk, scope, key, data)
+    return Response(data)
+
+
+@api_view(["PATCH"])
+@permission_classes([IsAuthenticated])
+async def amark_invoice_paid(request, pk):
+    return await aset_invoice_status(request, pk, "paid")
+
+
+@api_view(["PATCH"])
+@permission_classes([IsAuthenticated])
+async def amark_invoice_pending(request, pk):
+    return await aset_invoice_status(request, pk, "pending")
@@ -0,0 +1,335 @@
+"""Synthetic data and load scenarios for benchmarking the invoice API.
+
+Used by the ``generate_benchmark_data`` and ``benchmark_api`` management
+commands. Requests are sent either through Django's test client, in the
+current process, or to a running WSGI or ASGI server. The number of queries
+per request is read from the ``X-DB-Query-Count`` header, which the server
+adds when ``METRICS_DEBUG_HEADERS`` is on.
+"""
+
+import http.client
+import json
+import math
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from urllib.parse import urlsplit
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.test import Client
+from .models import Invoice, InvoiceItem, InvoiceSummary
+from transactions.models import Transaction
+
+SCENARIOS = ["list", "detail", "create", "update", "mark-paid"]
+
+
+def percentile(values, fraction):
+    """Return the value at ``fraction`` of the sorted ``values``"""
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def item_count(rng, max_items):
+    """Draw a number of items between 1 and ``max_items``, log-uniformly.
+
+    Most invoices get a few items and a few get hundreds, as in real data.
+    """
+    return min(max_items, int(math.exp(rng.uniform(0, math.log(max_items + 1)))))
+
+
+def generate_data(
+    users, invoices_per_user, max_items, prefix="bench", seed=0, batch_size=1000
+):
+    """Create ``users`` users, each with invoices, items and transactions.
+
+    About half of the invoices are paid and have a payment besides their
+    sale transaction. Users are named ``<prefix>-user-<n>`` and have the
+    password ``<prefix>``. Returns the created users.
+    """
+    rng = random.Random(seed)
+    created = []
+    for n in range(users):
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=f"{prefix}-user-{n}",
+                email=f"{prefix}-user-{n}@example.com",
+                password=prefix,
+            )
+            invoices, items_per_invoice = [], []
+            for i in range(invoices_per_user):
+                items = []
+                for j in range(item_count(rng, max_items)):
+                    item = InvoiceItem(
+                        description=f"Item {j}",
+                        quantity=rng.randint(1, 20),
+                        unit_price=Decimal(rng.randint(100, 100000)) / 100,
+                    )
+                    item.calculate_total_price()
+                    items.append(item)
+                invoices.append(
+                    Invoice(
+                        reference_number=f"{prefix.upper()}-{n}-{i:06d}",
+                        customer_name=f"Customer {rng.randint(1, 1000)}",
+                        customer_email=f"customer{rng.randint(1, 1000)}@example.com",
+                        total_amount=sum(item.total_price for item in items),
+                        status=rng.choice(["pending", "paid"]),
+                        created_by=user,
+                    )
+                )
+                items_per_invoice.append(items)
+            Invoice.objects.bulk_create(invoices, batch_size=batch_size)
+
+            items, transactions = [], []
+            for invoice, invoice_items in zip(invoices, items_per_invoice):
+                for item in invoice_items:
+                    item.invoice = invoice
+                    items.append(item)
+                types = ["sale", "payment"] if invoice.status == "paid" else ["sale"]
+                for transaction_type in types:
+                    transactions.append(
+                        Transaction(
+                            invoice=invoice,
+                            transaction_type=transaction_type,
+                            amount=invoice.total_amount,
+                            created_by=user,
+                        )
+                    )
+            InvoiceItem.objects.bulk_create(items, batch_size=batch_size)
+            Transaction.objects.bulk_create(transactions, batch_size=batch_size)
+            InvoiceSummary.rebuild(user.pk)
+        created.append(user)
+    return created
+
+
+class ScenarioRequests:
+    """Builds the requests of each scenario for one user's data"""
+
+    def __init__(self, user, api_prefix="/api/", seed=0):
+        self.api_prefix = api_prefix
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.run_id = f"{time.time_ns():x}"
+        self.created = 0
+        invoices = Invoice.objects.filter(created_by=user)
+        self.invoice_ids = list(invoices.values_list("pk", flat=True))
+        self.pending_ids = list(
+            invoices.filter(status="pending").values_list("pk", flat=True)
+        )
+        self.update_payloads = [
+            self.update_payload(invoice)
+            for invoice in invoices.prefetch_related("items").order_by("?")[:20]
+        ]
+
+    def update_payload(self, invoice):
+        return {
+            "pk": invoice.pk,
+            "reference_number": invoice.reference_number,
+            "customer_name": invoice.customer_name,
+            "customer_email": invoice.customer_email,
+            "items": [
+                {
+                    "id": item.pk,
+                    "description": item.description,
+                    "quantity": item.quantity,
+                    "unit_price": str(item.unit_price),
+                }
+                for item in invoice.items.all()
+            ],
+        }
+
+    def next(self, scenario):
+        """Return the ``(method, path, body)`` of the next request of ``scenario``"""
+        with self.lock:
+            if scenario == "list":
+                return "GET", f"{self.api_prefix}invoices/", None
+            if scenario == "detail":
+                pk = self.rng.choice(self.invoice_ids)
+                return "GET", f"{self.api_prefix}invoices/{pk}/", None
+            if scenario == "create":
+                self.created += 1
+                body = {
+                    "reference_number": f"RUN-{self.run_id}-{self.created}",
+                    "customer_name": "Benchmark Customer",
+                    "customer_email": "benchmark@example.com",
+                    "items": [
+                        {
+                            "description": f"Item {i}",
+                            "quantity": 2,
+                            "unit_price": "9.99",
+                        }
+                        for i in range(5)
+                    ],
+                }
+                return "POST", f"{self.api_prefix}invoices/", body
+            if scenario == "update":
+                payload = dict(self.rng.choice(self.update_payloads))
+                pk = payload.pop("pk")
+                payload["items"] = [dict(item) for item in payload["items"]]
+                if payload["items"]:
+                    payload["items"][0]["quantity"] = self.rng.randint(1, 20)
+                return "PUT", f"{self.api_prefix}invoices/{pk}/", payload
+            if scenario == "mark-paid":
+                # Once every pending invoice is paid the requests are no-ops
+                pk = (
+                    self.pending_ids.pop()
+                    if self.pending_ids
+                    else self.rng.choice(self.invoice_ids)
+                )
+                return "PATCH", f"{self.api_prefix}invoices/{pk}/mark-paid/", None
+        raise ValueError(f"Unknown scenario '{scenario}'")
+
+
+class TestClientTransport:
+    """Sends requests through Django's test client, in this process"""
+
+    name = "test-client"
+    concurrent = False
+
+    def __init__(self, token):
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def send(self, method, path, body):
+        response = self.client.generic(
+            method,
+            path,
+            json.dumps(body) if body is not None else "",
+            content_type="application/json",
+        )
+        return response.status_code, response.get("X-DB-Query-Count")
+
+
+class HTTPTransport:
+    """Sends requests to a running server, one keep-alive connection per thread"""
+
+    concurrent = True
+
+    def __init__(self, url, token):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Expected an http:// or https:// URL, got '{url}'")
+        self.name = url
+        self.connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.host, self.port = parts.hostname, parts.port
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        }
+        self.local = threading.local()
+
+    def send(self, method, path, body):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = self.connection_class(
+                self.host, self.port, timeout=60
+            )
+        try:
+            connection.request(
+                method,
+                path,
+                json.dumps(body) if body is not None else None,
+                self.headers,
+            )
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self.local.connection = None
+            raise
+        return response.status, response.getheader("X-DB-Query-Count")
+
+
+def run_scenario(transport, requests, scenario, count, concurrency=1, warmup=1):
+    """Send ``count`` requests of ``scenario`` and summarize them.
+
+    The ``warmup`` requests sent first fill caches and connections and are
+    not counted.
+    """
+    for _ in range(warmup):
+        try:
+            transport.send(*requests.next(scenario))
+        except (OSError, http.client.HTTPException):
+            pass
+
+    latencies, queries, errors = [], [], 0
+    lock = threading.Lock()
+
+    def send_one(_):
+        nonlocal errors
+        method, path, body = requests.next(scenario)
+        started = time.perf_counter()
+        try:
+            status, query_count = transport.send(method, path, body)
+        except (OSError, http.client.HTTPException):
+            status, query_count = None, None
+        seconds = time.perf_counter() - started
+        with lock:
+            if status is None or status >= 400:
+                errors += 1
+                return
+            latencies.append(seconds)
+            if query_count is not None:
+                queries.append(int(query_count))
+
+    started = time.perf_counter()
+    if transport.concurrent and concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(send_one, range(count)))
+    else:
+        for i in range(count):
+            send_one(i)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0,
+            "p50": round(percentile(latencies, 0.5) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+        },
+        "queries_per_request": (
+            {"mean": round(statistics.fmean(queries), 2), "max": max(queries)}
+            if queries
+            else None
+        ),
+    }
+
+
+def compare_to_baseline(results, baseline, max_regression):
+    """Return a message for each scenario that regressed against ``baseline``.
+
+    A scenario regresses when its p95 latency grew by more than the
+    ``max_regression`` fraction, its throughput shrank by more than it, or
+    it makes more queries per request.
+    """
+    regressions = []
+    for scenario, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if previous is None:
+            continue
+        p95, previous_p95 = current["latency_ms"]["p95"], previous["latency_ms"]["p95"]
+        if previous_p95 and p95 > previous_p95 * (1 + max_regression):
+            regressions.append(f"{scenario}: p95 latency {previous_p95}ms -> {p95}ms")
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - max_regression):
+            regressions.append(
+                f"{scenario}: throughput {previous['rps']} -> {current['rps']} req/s"
+            )
+        queries = current["queries_per_request"]
+        previous_queries = previous["queries_per_request"]
+        if queries and previous_queries and queries["max"] > previous_queries["max"]:
+            regressions.append(
+                f"{scenario}: queries per request {previous_queries['max']} -> "
+                f"{queries['max']}"
+            )
+    return regressions
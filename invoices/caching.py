@@ -0,0 +1,116 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.utils.http import parse_etags, quote_etag
+
+
+def detail_cache_key(pk):
+    return f"invoices:detail:{pk}"
+
+
+def invoice_version(queryset, pk):
+    """Return a query for the values invoice ``pk``'s ETag is derived from"""
+    return (
+        queryset.filter(pk=pk)
+        .values("pk", "updated_at")
+        .annotate(
+            item_count=Count("items"),
+            last_item=Max("items__id"),
+            items_total=Sum("items__total_price"),
+        )
+        .order_by("pk")
+    )
+
+
+def version_etag(version):
+    digest = hashlib.md5(
+        "|".join(
+            str(value)
+            for value in (
+                version["pk"],
+                version["updated_at"].isoformat(),
+                version["item_count"],
+                version["last_item"],
+                version["items_total"],
+            )
+        ).encode()
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+def invoice_etag(queryset, pk):
+    """Return the ETag of invoice ``pk`` in ``queryset``, or None if it is not there.
+
+    The tag is derived from ``updated_at`` and the invoice's item set, read
+    with a single aggregate query that loads neither the invoice nor its items.
+    """
+    version = invoice_version(queryset, pk).first()
+    if version is None:
+        return None
+    return version_etag(version)
+
+
+async def ainvoice_etag(queryset, pk):
+    """Async version of ``invoice_etag``"""
+    version = await invoice_version(queryset, pk).afirst()
+    if version is None:
+        return None
+    return version_etag(version)
+
+
+def etag_matches(request, etag):
+    """Check the request's If-None-Match header against ``etag``"""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    # Weak and strong tags compare equal for a conditional GET
+    return "*" in etags or any(tag.removeprefix("W/") == etag for tag in etags)
+
+
+def get_cached_detail(pk, etag):
+    """Return the cached payload of invoice ``pk`` if it matches ``etag``"""
+    if not settings.INVOICE_DETAIL_CACHE_TIMEOUT:
+        return None
+    cached = cache.get(detail_cache_key(pk))
+    if cached is not None and cached[0] == etag:
+        return cached[1]
+    return None
+
+
+async def aget_cached_detail(pk, etag):
+    """Async version of ``get_cached_detail``"""
+    if not settings.INVOICE_DETAIL_CACHE_TIMEOUT:
+        return None
+    cached = await cache.aget(detail_cache_key(pk))
+    if cached is not None and cached[0] == etag:
+        return cached[1]
+    return None
+
+
+def cache_detail(pk, etag, data):
+    if settings.INVOICE_DETAIL_CACHE_TIMEOUT:
+        cache.set(
+            detail_cache_key(pk),
+            (etag, data),
+            timeout=settings.INVOICE_DETAIL_CACHE_TIMEOUT,
+        )
+
+
+async def acache_detail(pk, etag, data):
+    if settings.INVOICE_DETAIL_CACHE_TIMEOUT:
+        await cache.aset(
+            detail_cache_key(pk),
+            (etag, data),
+            timeout=settings.INVOICE_DETAIL_CACHE_TIMEOUT,
+        )
+
+
+def invalidate_invoice_cache(*pks):
+    """Drop the cached payloads of the given invoices after a write"""
+    cache.delete_many([detail_cache_key(pk) for pk in pks if pk is not None])
+
+
+async def ainvalidate_invoice_cache(*pks):
+    await cache.adelete_many([detail_cache_key(pk) for pk in pks if pk is not None])
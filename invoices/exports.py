@@ -0,0 +1,116 @@
+import csv
+import json
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+INVOICE_CSV_HEADER = [
+    "invoice_id",
+    "reference_number",
+    "customer_name",
+    "customer_email",
+    "status",
+    "total_amount",
+    "created_at",
+    "updated_at",
+    "item_id",
+    "item_description",
+    "item_quantity",
+    "item_unit_price",
+    "item_total_price",
+]
+
+
+class CSVRenderer(BaseRenderer):
+    """Renders CSV; export views stream their rows, this covers error responses"""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, dict):
+            data = [data]
+        header = list(data[0].keys()) if data else []
+        buffer = Echo()
+        writer = csv.writer(buffer)
+        lines = [writer.writerow(header)]
+        lines.extend(writer.writerow([row.get(key) for key in header]) for row in data)
+        return "".join(lines).encode(self.charset)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renders newline-delimited JSON; see ``CSVRenderer``"""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, dict):
+            data = [data]
+        return "".join(json.dumps(row) + "\n" for row in data).encode(self.charset)
+
+
+class Echo:
+    """File-like object whose ``write`` returns the value instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def stream_export(renderer, filename, header, csv_rows, records):
+    """Stream an export as CSV rows or NDJSON records, depending on ``renderer``.
+
+    ``csv_rows`` and ``records`` are generator functions; only the one for
+    the requested format is consumed, lazily, as the response is sent.
+    """
+    if renderer.format == "csv":
+        writer = csv.writer(Echo())
+        content = (writer.writerow(row) for row in _with_header(header, csv_rows()))
+    else:
+        content = (json.dumps(record) + "\n" for record in records())
+
+    response = StreamingHttpResponse(
+        content, content_type=f"{renderer.media_type}; charset={renderer.charset}"
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{renderer.format}"'
+    )
+    return response
+
+
+def _with_header(header, rows):
+    yield header
+    yield from rows
+
+
+def invoice_csv_rows(record):
+    """Yield one CSV row per item of an invoice record, or one row if it has none"""
+    invoice_columns = [
+        record["id"],
+        record["reference_number"],
+        record["customer_name"],
+        record["customer_email"],
+        record["status"],
+        record["total_amount"],
+        record["created_at"],
+        record["updated_at"],
+    ]
+    items = record["items"]
+    if not items:
+        yield invoice_columns + [""] * 5
+    for item in items:
+        yield invoice_columns + [
+            item["id"],
+            item["description"],
+            item["quantity"],
+            item["unit_price"],
+            item["total_price"],
+        ]
@@ -0,0 +1,90 @@
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+from .models import Invoice
+
+
+class InvoiceFilterBackend(BaseFilterBackend):
+    """Filter invoices by query parameters.
+
+    Supported parameters:
+
+    - ``status``: one or more comma-separated statuses
+    - ``created_after`` / ``created_before``: ISO 8601 date or datetime bounds
+    - ``customer_email``: exact customer email
+    - ``reference_number``: reference number prefix
+    - ``min_amount`` / ``max_amount``: total amount bounds
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        if params.get("status"):
+            statuses = params["status"].split(",")
+            valid = {choice for choice, _ in Invoice.STATUS_CHOICES}
+            if not set(statuses) <= valid:
+                raise serializers.ValidationError(
+                    {"status": f"Expected one of: {', '.join(sorted(valid))}"}
+                )
+            queryset = queryset.filter(status__in=statuses)
+
+        if params.get("created_after"):
+            queryset = queryset.filter(
+                created_at__gte=self.parse_datetime(params, "created_after")
+            )
+        if params.get("created_before"):
+            queryset = queryset.filter(
+                created_at__lt=self.parse_datetime(params, "created_before")
+            )
+
+        if params.get("customer_email"):
+            queryset = queryset.filter(customer_email=params["customer_email"])
+
+        if params.get("reference_number"):
+            queryset = queryset.filter(
+                reference_number__startswith=params["reference_number"]
+            )
+
+        if params.get("min_amount"):
+            queryset = queryset.filter(
+                total_amount__gte=self.parse_amount(params, "min_amount")
+            )
+        if params.get("max_amount"):
+            queryset = queryset.filter(
+                total_amount__lte=self.parse_amount(params, "max_amount")
+            )
+
+        return queryset
+
+    def parse_datetime(self, params, name):
+        """Parse a date or datetime parameter into an aware datetime"""
+        value = params[name]
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                date = parse_date(value)
+                if date is not None:
+                    parsed = datetime.combine(date, time.min)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise serializers.ValidationError(
+                {name: "Expected an ISO 8601 date or datetime"}
+            )
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def parse_amount(self, params, name):
+        """Parse a decimal amount parameter"""
+        try:
+            value = Decimal(params[name])
+        except InvalidOperation:
+            value = None
+        # NaN and Infinity parse, but the DecimalField lookup rejects them
+        if value is None or not value.is_finite():
+            raise serializers.ValidationError({name: "Expected a decimal amount"})
+        return value
@@ -0,0 +1,58 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# How long a request holds its key before a retry may run it again
+IN_PROGRESS_TIMEOUT = 60
+
+
+def idempotency_key(request):
+    """Return the request's idempotency key, or None if it did not send one"""
+    return request.headers.get(IDEMPOTENCY_HEADER, "").strip() or None
+
+
+def stored_response_key(user_id, scope, key):
+    # Keys are chosen by clients, so they are hashed to a fixed length
+    digest = hashlib.sha256(f"{scope}|{key}".encode()).hexdigest()
+    return f"idempotency:{user_id}:{digest}"
+
+
+def get_stored_response(user_id, scope, key):
+    """Return what was stored for ``key`` by the user in ``scope``, if anything"""
+    return cache.get(stored_response_key(user_id, scope, key))
+
+
+def store_response(user_id, scope, key, response):
+    """Keep ``response`` for replays of the same key, until the key expires"""
+    cache.set(
+        stored_response_key(user_id, scope, key),
+        response,
+        timeout=settings.IDEMPOTENCY_KEY_TIMEOUT,
+    )
+
+
+def claim_key(user_id, scope, key):
+    """Mark ``key`` as in progress; return False if another request holds it"""
+    return cache.add(
+        stored_response_key(user_id, scope, key) + ":lock",
+        True,
+        timeout=IN_PROGRESS_TIMEOUT,
+    )
+
+
+def release_key(user_id, scope, key):
+    cache.delete(stored_response_key(user_id, scope, key) + ":lock")
+
+
+async def aget_stored_response(user_id, scope, key):
+    return await cache.aget(stored_response_key(user_id, scope, key))
+
+
+async def astore_response(user_id, scope, key, response):
+    await cache.aset(
+        stored_response_key(user_id, scope, key),
+        response,
+        timeout=settings.IDEMPOTENCY_KEY_TIMEOUT,
+    )
@@ -0,0 +1,151 @@
+import json
+from datetime import datetime, timezone
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from invoices.benchmarking import (
+    SCENARIOS,
+    HTTPTransport,
+    ScenarioRequests,
+    TestClientTransport,
+    compare_to_baseline,
+    run_scenario,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the list, detail, create, update and mark-paid endpoints "
+        "as one user, through the test client or against a running server "
+        "(--url), and report latency percentiles, queries per request and "
+        "throughput as JSON. With --baseline, fail on regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--username",
+            required=True,
+            help="User to send the requests as, e.g. one from generate_benchmark_data",
+        )
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running WSGI or ASGI server; the test client "
+            "is used when omitted. Queries per request are only reported if "
+            "the server runs with METRICS_DEBUG_HEADERS=true",
+        )
+        parser.add_argument(
+            "--api-prefix",
+            default="/api/",
+            help="Path the invoice endpoints are under (default: /api/)",
+        )
+        parser.add_argument(
+            "--scenarios",
+            default=",".join(SCENARIOS),
+            help=f"Comma-separated scenarios to run (default: {','.join(SCENARIOS)})",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests per scenario (default: 200)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Concurrent requests against --url (default: 1)",
+        )
+        parser.add_argument("--label", help="Name of the run, stored with the results")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument(
+            "--baseline", help="Compare with the results stored in this JSON file"
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=0.2,
+            help="Allowed fractional p95 latency and throughput regression "
+            "against the baseline (default: 0.2)",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options["scenarios"].split(",")]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive")
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        requests = ScenarioRequests(user, api_prefix=options["api_prefix"])
+        if not requests.invoice_ids:
+            raise CommandError(f"User '{user.username}' has no invoices")
+        token = str(AccessToken.for_user(user))
+        if options["url"]:
+            try:
+                transport = HTTPTransport(options["url"], token)
+            except ValueError as e:
+                raise CommandError(str(e))
+        else:
+            transport = TestClientTransport(token)
+
+        results = {
+            "label": options["label"],
+            "target": transport.name,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "requests_per_scenario": options["requests"],
+            "concurrency": options["concurrency"] if transport.concurrent else 1,
+            "scenarios": {},
+        }
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            METRICS_DEBUG_HEADERS=True,
+        ):
+            for scenario in scenarios:
+                results["scenarios"][scenario] = run_scenario(
+                    transport,
+                    requests,
+                    scenario,
+                    options["requests"],
+                    concurrency=options["concurrency"],
+                )
+
+        # A server without METRICS_DEBUG_HEADERS sends no query counts
+        uncounted = [
+            name
+            for name, result in results["scenarios"].items()
+            if result["queries_per_request"] is None
+            and result["errors"] < result["requests"]
+        ]
+        if uncounted:
+            self.stderr.write(
+                self.style.WARNING(
+                    f"No X-DB-Query-Count header from {transport.name} for "
+                    f"{', '.join(uncounted)}: run the server with "
+                    "METRICS_DEBUG_HEADERS=true to report queries per request"
+                )
+            )
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
+
+        if options["baseline"]:
+            try:
+                with open(options["baseline"], encoding="utf-8") as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read the baseline: {e}")
+            regressions = compare_to_baseline(
+                results, baseline, options["max_regression"]
+            )
+            if regressions:
+                raise CommandError("Regressions:\n" + "\n".join(regressions))
+            self.stderr.write(self.style.SUCCESS("No regressions against the baseline"))
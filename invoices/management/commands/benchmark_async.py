@@ -0,0 +1,160 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+from invoices.benchmarking import percentile
+from invoices.models import Invoice
+from transactions.models import Transaction
+
+# Where each kind of server serves the endpoints under test
+API_PREFIXES = {"wsgi": "/api/", "asgi": "/api/async/"}
+
+
+async def fetch(host, port, path, token, client_delay):
+    """GET ``path`` on a fresh connection and return ``(status, seconds)``.
+
+    With a ``client_delay`` the request headers are sent in two halves that
+    far apart, like a client on a slow network would.
+    """
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {host}\r\n"
+            f"Authorization: Bearer {token}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode()
+        if client_delay:
+            half = len(request) // 2
+            writer.write(request[:half])
+            await writer.drain()
+            await asyncio.sleep(client_delay)
+            request = request[half:]
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    return int(status_line.split()[1]), time.perf_counter() - started
+
+
+async def run_load(host, port, path, token, connections, requests, client_delay):
+    """Fetch ``path`` from ``connections`` concurrent clients.
+
+    Returns the latencies of successful requests, the number of failed ones
+    and the wall time.
+    """
+    latencies, failures = [], 0
+
+    async def client():
+        nonlocal failures
+        for _ in range(requests):
+            try:
+                status, seconds = await fetch(host, port, path, token, client_delay)
+            except (OSError, ValueError, IndexError):
+                failures += 1
+                continue
+            if status == 200:
+                latencies.append(seconds)
+            else:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    return latencies, failures, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the invoice and transaction read endpoints of running WSGI and "
+        "ASGI servers with many concurrent, optionally slow, clients and "
+        "report throughput and latency for each. Serve the same database "
+        "from e.g. `gunicorn invoice_management.wsgi` and "
+        "`uvicorn invoice_management.asgi:application`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--wsgi-url", help="Base URL of the WSGI server, e.g. http://127.0.0.1:8000"
+        )
+        parser.add_argument(
+            "--asgi-url", help="Base URL of the ASGI server, e.g. http://127.0.0.1:8001"
+        )
+        parser.add_argument(
+            "--username",
+            required=True,
+            help="User whose invoices and transactions are requested",
+        )
+        parser.add_argument(
+            "--connections",
+            type=int,
+            default=100,
+            help="Concurrent clients (default: 100)",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=10,
+            help="Requests made by each client per endpoint (default: 10)",
+        )
+        parser.add_argument(
+            "--client-delay",
+            type=float,
+            default=0,
+            help="Seconds each client takes to send its request headers",
+        )
+
+    def handle(self, *args, **options):
+        targets = {
+            kind: options[f"{kind}_url"]
+            for kind in API_PREFIXES
+            if options[f"{kind}_url"]
+        }
+        if not targets:
+            raise CommandError("Give --wsgi-url and/or --asgi-url")
+        if options["connections"] < 1 or options["requests"] < 1:
+            raise CommandError("--connections and --requests must be positive")
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        token = str(AccessToken.for_user(user))
+        endpoints = ["invoices/", "transactions/"]
+        invoice = Invoice.objects.filter(created_by=user).order_by("-pk").first()
+        if invoice is not None:
+            endpoints.append(f"invoices/{invoice.pk}/")
+        transaction = (
+            Transaction.objects.filter(created_by=user).order_by("-pk").first()
+        )
+        if transaction is not None:
+            endpoints.append(f"transactions/{transaction.pk}/")
+
+        for kind, url in targets.items():
+            parts = urlsplit(url)
+            if parts.scheme != "http" or not parts.hostname:
+                raise CommandError(f"Expected an http:// URL, got '{url}'")
+            for endpoint in endpoints:
+                path = API_PREFIXES[kind] + endpoint
+                latencies, failures, elapsed = asyncio.run(
+                    run_load(
+                        parts.hostname,
+                        parts.port or 80,
+                        path,
+                        token,
+                        options["connections"],
+                        options["requests"],
+                        options["client_delay"],
+                    )
+                )
+                self.stdout.write(
+                    f"{kind} {path}: {len(latencies)} ok, {failures} failed, "
+                    f"{len(latencies) / elapsed:.1f} req/s, "
+                    f"p50={percentile(latencies, 0.5) * 1000:.0f}ms "
+                    f"p95={percentile(latencies, 0.95) * 1000:.0f}ms "
+                    f"p99={percentile(latencies, 0.99) * 1000:.0f}ms"
+                )
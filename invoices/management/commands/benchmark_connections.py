@@ -0,0 +1,111 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+from invoices.benchmarking import percentile
+
+
+def simulate_requests(wrapper, count):
+    """Run ``count`` one-query requests on ``wrapper``; return their seconds.
+
+    Each request starts and ends with the connection housekeeping Django
+    runs on ``request_started`` and ``request_finished``, so whether the
+    connection is reused, health-checked or returned to a pool follows the
+    wrapper's settings as it would in a server.
+    """
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        wrapper.close_if_unusable_or_obsolete()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the per-request cost of opening database connections: run "
+        "one-query requests with a new connection each, with persistent "
+        "connections and, with --pool, with a psycopg connection pool, and "
+        "report latency for each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help=f"Database to connect to (default: {DEFAULT_DB_ALIAS})",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests per configuration (default: 200)",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=60,
+            help="CONN_MAX_AGE of the persistent configuration (default: 60)",
+        )
+        parser.add_argument(
+            "--pool",
+            action="store_true",
+            help="Also measure a connection pool; needs PostgreSQL and "
+            'psycopg 3 with `pip install "psycopg[binary,pool]"`',
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be positive")
+        base = connections[options["database"]].settings_dict
+        base_options = {k: v for k, v in base["OPTIONS"].items() if k != "pool"}
+        configurations = [
+            ("new connection per request", {"CONN_MAX_AGE": 0}, base_options),
+            (
+                f"persistent (CONN_MAX_AGE={options['max_age']}, health checks)",
+                {"CONN_MAX_AGE": options["max_age"], "CONN_HEALTH_CHECKS": True},
+                base_options,
+            ),
+        ]
+        if options["pool"]:
+            if connections[options["database"]].vendor != "postgresql":
+                raise CommandError("--pool needs a PostgreSQL database")
+            configurations.append(
+                (
+                    "psycopg pool",
+                    {"CONN_MAX_AGE": 0},
+                    {**base_options, "pool": {"min_size": 1, "max_size": 1}},
+                )
+            )
+
+        baseline = None
+        for name, overrides, db_options in configurations:
+            settings_dict = {**base, **overrides, "OPTIONS": db_options}
+            wrapper = load_backend(base["ENGINE"]).DatabaseWrapper(
+                settings_dict, options["database"]
+            )
+            try:
+                # The first request pays for imports and the pool's startup
+                simulate_requests(wrapper, 1)
+                timings = simulate_requests(wrapper, options["requests"])
+            finally:
+                wrapper.close()
+                if "pool" in db_options:
+                    wrapper.close_pool()
+
+            mean = statistics.fmean(timings)
+            line = (
+                f"{name}: mean={mean * 1000:.2f}ms "
+                f"p50={percentile(timings, 0.5) * 1000:.2f}ms "
+                f"p95={percentile(timings, 0.95) * 1000:.2f}ms"
+            )
+            if baseline is None:
+                baseline = mean
+            else:
+                line += f", {(baseline - mean) * 1000:.2f}ms saved per request"
+            self.stdout.write(line)
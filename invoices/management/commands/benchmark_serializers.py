@@ -0,0 +1,101 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from invoices.models import Invoice
+from invoices.records import INVOICE_COLUMNS
+from invoices.serializers import InvoiceRowSerializer, InvoiceSerializer
+from transactions.models import Transaction
+from transactions.serializers import (
+    TRANSACTION_FIELDS,
+    TransactionRowSerializer,
+    TransactionSerializer,
+)
+
+# Fields of a listing screen, which needs no items
+SPARSE_INVOICE_FIELDS = ["id", "reference_number", "total_amount", "status"]
+
+
+def best_time(serialize, repeat):
+    """Return the fastest of ``repeat`` runs of ``serialize``, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        serialize()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time loading and serializing a user's invoices and transactions with "
+        "the model serializers and with the row serializers the list and "
+        "export endpoints use, and report the speedup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--username",
+            required=True,
+            help="User whose invoices and transactions are serialized",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1000,
+            help="Invoices and transactions serialized per run (default: 1000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Runs per case; the fastest is reported (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        if options["rows"] < 1 or options["repeat"] < 1:
+            raise CommandError("--rows and --repeat must be positive")
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        rows = options["rows"]
+        invoices = Invoice.objects.filter(created_by=user).order_by("id")[:rows]
+        transactions = Transaction.objects.filter(created_by=user).order_by("id")[:rows]
+        cases = [
+            (
+                "invoices",
+                lambda: InvoiceSerializer(
+                    invoices.prefetch_related("items"), many=True
+                ).data,
+                lambda: InvoiceRowSerializer(
+                    invoices.values(*INVOICE_COLUMNS), many=True
+                ).data,
+            ),
+            (
+                f"invoices ?fields={','.join(SPARSE_INVOICE_FIELDS)}",
+                lambda: InvoiceSerializer(
+                    invoices.prefetch_related("items"), many=True
+                ).data,
+                lambda: InvoiceRowSerializer(
+                    invoices.values(*INVOICE_COLUMNS),
+                    many=True,
+                    fields=SPARSE_INVOICE_FIELDS,
+                ).data,
+            ),
+            (
+                "transactions",
+                lambda: TransactionSerializer(transactions, many=True).data,
+                lambda: TransactionRowSerializer(
+                    transactions.values(*TRANSACTION_FIELDS), many=True
+                ).data,
+            ),
+        ]
+
+        for name, model_serializer, row_serializer in cases:
+            before = best_time(model_serializer, options["repeat"])
+            after = best_time(row_serializer, options["repeat"])
+            self.stdout.write(
+                f"{name}: {before * 1000:.1f}ms -> {after * 1000:.1f}ms "
+                f"({before / after:.1f}x faster)"
+            )
@@ -0,0 +1,64 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from invoices.benchmarking import generate_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Create synthetic users, invoices with 1 to --max-items items and "
+        "their transactions, for benchmark_api. Users are named "
+        "<prefix>-user-<n> and their password is the prefix."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=5, help="Users to create (default: 5)"
+        )
+        parser.add_argument(
+            "--invoices",
+            type=int,
+            default=200,
+            help="Invoices per user (default: 200)",
+        )
+        parser.add_argument(
+            "--max-items",
+            type=int,
+            default=500,
+            help="Most items on one invoice (default: 500)",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="bench",
+            help="Prefix of the user names and reference numbers (default: bench)",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed (default: 0)"
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["invoices"] < 1 or options["max_items"] < 1:
+            raise CommandError("--users, --invoices and --max-items must be positive")
+        if User.objects.filter(
+            username__startswith=f"{options['prefix']}-user-"
+        ).exists():
+            raise CommandError(
+                f"Benchmark users with prefix '{options['prefix']}' already exist, "
+                "choose another --prefix"
+            )
+
+        started = time.monotonic()
+        users = generate_data(
+            options["users"],
+            options["invoices"],
+            options["max_items"],
+            prefix=options["prefix"],
+            seed=options["seed"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {len(users)} users with {options['invoices']} invoices "
+                f"each in {time.monotonic() - started:.1f}s: "
+                f"{', '.join(user.username for user in users)}"
+            )
+        )
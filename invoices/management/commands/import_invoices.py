@@ -0,0 +1,241 @@
+import csv
+import json
+import multiprocessing
+import sys
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connections
+from invoices.serializers import InvoiceBatchSerializer, InvoiceBulkListSerializer
+
+INVOICE_FIELDS = ["reference_number", "customer_name", "customer_email", "status"]
+
+
+def read_records(path, file_format, owns=lambda index: True):
+    """Yield ``(index, record, error)`` for each invoice of the file ``owns``.
+
+    NDJSON files hold one invoice per line, shaped like the API payload.
+    CSV files hold one row per item, as written by the invoice export:
+    consecutive rows with the same ``reference_number`` form one invoice,
+    and a row with an empty ``item_description`` is an invoice without items.
+    Invoices for which ``owns(index)`` is false are counted but not parsed,
+    so parallel workers each parse only their own share of the file.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "ndjson":
+            index = -1
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                index += 1
+                if not owns(index):
+                    continue
+                try:
+                    yield index, json.loads(line), None
+                except json.JSONDecodeError as e:
+                    yield index, None, f"line {line_number}: invalid JSON ({e})"
+            return
+
+        index, reference, record = -1, None, None
+        for row in csv.DictReader(f):
+            if index < 0 or row.get("reference_number") != reference:
+                if record is not None:
+                    yield index, record, None
+                index += 1
+                reference = row.get("reference_number") or None
+                record = None
+                if owns(index):
+                    record = {
+                        field: row[field] for field in INVOICE_FIELDS if row.get(field)
+                    }
+                    record["items"] = []
+            if record is not None and row.get("item_description"):
+                record["items"].append(
+                    {
+                        "description": row["item_description"],
+                        "quantity": row.get("item_quantity"),
+                        "unit_price": row.get("item_unit_price"),
+                    }
+                )
+        if record is not None:
+            yield index, record, None
+
+
+def import_file(
+    path,
+    file_format,
+    user_id,
+    batch_size,
+    offset,
+    dry_run,
+    worker=0,
+    workers=1,
+    stdout=None,
+    stderr=None,
+):
+    """Import this worker's share of the records at or after ``offset``.
+
+    Records are validated with the API's serializer rules and written with
+    ``bulk_create`` one batch at a time. After each batch the index of the
+    next record is printed, so an interrupted import can be resumed from the
+    lowest index reported by each worker. Returns the import counters.
+    """
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    user = User.objects.get(pk=user_id)
+    stats = {"imported": 0, "skipped": 0, "failed": 0}
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        write_batch(batch, user, dry_run, stats, stderr)
+        stdout.write(f"[worker {worker}] next offset: {batch[-1][0] + 1}\n")
+        stdout.flush()
+        batch.clear()
+
+    def owns(index):
+        return index >= offset and index % workers == worker
+
+    for index, record, error in read_records(path, file_format, owns):
+        if error is None:
+            serializer = InvoiceBatchSerializer(data=record)
+            if serializer.is_valid():
+                batch.append((index, serializer.validated_data))
+                if len(batch) >= batch_size:
+                    flush()
+                continue
+            error = json.dumps(serializer.errors)
+        stats["failed"] += 1
+        stderr.write(f"record {index}: {error}\n")
+    flush()
+    return stats
+
+
+def write_batch(batch, user, dry_run, stats, stderr):
+    """Insert the new invoices of a validated batch, skipping existing ones"""
+    # A concurrent worker or request may claim a reference number between
+    # the check and the insert, so re-check once before giving up
+    for attempt in range(2):
+        new, duplicates = InvoiceBulkListSerializer.split_new_references(batch)
+        if dry_run or not new:
+            break
+        try:
+            InvoiceBatchSerializer(many=True).create(
+                [{**data, "created_by": user} for _, data in new]
+            )
+            break
+        except IntegrityError as e:
+            if attempt:
+                stats["failed"] += len(new)
+                stderr.write(
+                    f"records {new[0][0]}-{new[-1][0]}: batch rejected ({e})\n"
+                )
+                return
+    stats["imported"] += len(new)
+    stats["skipped"] += len(duplicates)
+
+
+def _run_worker(args):
+    try:
+        return import_file(*args)
+    finally:
+        # Each forked worker owns its connection
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream invoices from a CSV or NDJSON file into the database in batches. "
+        "Invoices whose reference number already exists are skipped, so an "
+        "interrupted import can be re-run or resumed with --offset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file to import")
+        parser.add_argument(
+            "--user",
+            required=True,
+            help="Username recorded as the creator of the imported invoices",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "ndjson"],
+            help="File format (default: guessed from the file extension)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Invoices written per bulk insert (default: 1000)",
+        )
+        parser.add_argument(
+            "--offset",
+            type=int,
+            default=0,
+            help="Skip the first N invoices of the file, e.g. to resume an import",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the file and report what would be imported",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of parallel worker processes (default: 1)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or (
+            "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+        )
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size and --workers must be positive")
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']!r} does not exist")
+
+        started = time.monotonic()
+        jobs = [
+            (
+                path,
+                file_format,
+                user.pk,
+                options["batch_size"],
+                options["offset"],
+                options["dry_run"],
+                worker,
+                options["workers"],
+            )
+            for worker in range(options["workers"])
+        ]
+        try:
+            if options["workers"] == 1:
+                results = [
+                    import_file(*jobs[0], stdout=self.stdout, stderr=self.stderr)
+                ]
+            else:
+                # Forked workers must not share the parent's connection
+                connections.close_all()
+                context = multiprocessing.get_context("fork")
+                with context.Pool(options["workers"]) as pool:
+                    results = pool.map(_run_worker, jobs)
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        totals = {
+            key: sum(result[key] for result in results)
+            for key in ("imported", "skipped", "failed")
+        }
+        elapsed = time.monotonic() - started
+        verb = "Would import" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {totals['imported']} invoices, skipped {totals['skipped']} "
+                f"existing, {totals['failed']} failed in {elapsed:.1f}s"
+            )
+        )
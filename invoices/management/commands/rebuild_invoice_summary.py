@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from invoices.models import Invoice, InvoiceSummary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-user invoice summary counters from the invoices table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare the counters with the invoices and report drift",
+        )
+        parser.add_argument(
+            "--user-id",
+            type=int,
+            help="Limit the rebuild or verification to one user",
+        )
+
+    def handle(self, *args, **options):
+        user_id = options["user_id"]
+
+        if options["verify"]:
+            mismatches = self.find_mismatches(user_id)
+            for key, (expected, stored) in sorted(mismatches.items()):
+                self.stdout.write(
+                    f"user {key[0]} {key[1]}: expected {expected}, stored {stored}"
+                )
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} summary rows are out of date")
+            self.stdout.write(self.style.SUCCESS("Invoice summary is up to date"))
+            return
+
+        InvoiceSummary.rebuild(created_by_id=user_id)
+        self.stdout.write(self.style.SUCCESS("Invoice summary rebuilt"))
+
+    def find_mismatches(self, user_id):
+        """Return ``{(user_id, status): (expected, stored)}`` for drifted rows"""
+        invoices = Invoice.objects.all()
+        rows = InvoiceSummary.objects.all()
+        if user_id is not None:
+            invoices = invoices.filter(created_by_id=user_id)
+            rows = rows.filter(created_by_id=user_id)
+
+        expected = {
+            (row["created_by"], row["status"]): (
+                row["invoice_count"],
+                row["total_amount"] or 0,
+            )
+            for row in InvoiceSummary.aggregate_invoices(invoices)
+        }
+        stored = {
+            (row.created_by_id, row.status): (row.invoice_count, row.total_amount)
+            for row in rows
+        }
+
+        mismatches = {}
+        for key in expected.keys() | stored.keys():
+            expected_values = expected.get(key, (0, 0))
+            stored_values = stored.get(key, (0, 0))
+            if expected_values != stored_values:
+                mismatches[key] = (expected_values, stored_values)
+        return mismatches
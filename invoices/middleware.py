@@ -0,0 +1,139 @@
+import hashlib
+from collections import namedtuple
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import APIException
+from authentication.authentication import CachedJWTAuthentication
+from .idempotency import (
+    claim_key,
+    get_stored_response,
+    idempotency_key,
+    release_key,
+    store_response,
+)
+
+Claim = namedtuple("Claim", ["user_id", "scope", "key", "fingerprint"])
+
+
+class IdempotencyKeyMiddleware:
+    """Replay the response to a retried POST sent with an ``Idempotency-Key``.
+
+    Applies to the paths in ``settings.IDEMPOTENCY_KEY_PATHS``. Successful
+    responses are stored per user and key, with a fingerprint of the request
+    body, for ``settings.IDEMPOTENCY_KEY_TIMEOUT`` seconds. A retry with the
+    same key and body gets the stored response without reaching the view;
+    reusing a key for a different body gives 422, and a retry arriving while
+    the first request is still running gives 409.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.applies(request):
+            return self.get_response(request)
+
+        claim, response = self.begin(request)
+        if response is not None:
+            return response
+        if claim is None:
+            return self.get_response(request)
+        try:
+            response = self.get_response(request)
+            self.remember(claim, response)
+        finally:
+            release_key(claim.user_id, claim.scope, claim.key)
+        return response
+
+    async def __acall__(self, request):
+        if not self.applies(request):
+            return await self.get_response(request)
+
+        claim, response = await sync_to_async(self.begin)(request)
+        if response is not None:
+            return response
+        if claim is None:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+            await sync_to_async(self.remember)(claim, response)
+        finally:
+            await sync_to_async(release_key)(claim.user_id, claim.scope, claim.key)
+        return response
+
+    def applies(self, request):
+        return (
+            request.method == "POST"
+            and request.path in settings.IDEMPOTENCY_KEY_PATHS
+            and idempotency_key(request) is not None
+        )
+
+    def begin(self, request):
+        """Return ``(claim, response)`` for the request.
+
+        ``claim`` is the request's hold on its key while the view runs, and
+        ``response`` what to send without running the view. Both are None
+        for requests left to the view, e.g. unauthenticated ones.
+        """
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except APIException:
+            authenticated = None
+        if authenticated is None:
+            # Leave it to the view to reject the request
+            return None, None
+
+        claim = Claim(
+            authenticated[0].pk,
+            f"{request.method} {request.path}",
+            idempotency_key(request),
+            hashlib.sha256(request.body).hexdigest(),
+        )
+        stored = get_stored_response(claim.user_id, claim.scope, claim.key)
+        if stored is not None:
+            return None, self.replay(claim, stored)
+        if not claim_key(claim.user_id, claim.scope, claim.key):
+            return None, JsonResponse(
+                {"error": "A request with this Idempotency-Key is in progress"},
+                status=409,
+            )
+        return claim, None
+
+    def replay(self, claim, stored):
+        if stored["fingerprint"] != claim.fingerprint:
+            return JsonResponse(
+                {"error": "This Idempotency-Key was used for a different request"},
+                status=422,
+            )
+        response = HttpResponse(
+            stored["content"],
+            status=stored["status"],
+            content_type=stored["content_type"],
+        )
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    def remember(self, claim, response):
+        # Failed requests changed nothing, so they may be retried for real
+        if response.streaming or not 200 <= response.status_code < 300:
+            return
+        store_response(
+            claim.user_id,
+            claim.scope,
+            claim.key,
+            {
+                "fingerprint": claim.fingerprint,
+                "status": response.status_code,
+                "content": response.content,
+                "content_type": response.get("Content-Type"),
+            },
+        )
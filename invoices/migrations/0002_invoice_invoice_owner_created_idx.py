@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["created_by", "-created_at", "id"],
+                name="invoice_owner_created_idx",
+            ),
+        ),
+    ]
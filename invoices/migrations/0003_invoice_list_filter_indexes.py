@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0002_invoice_invoice_owner_created_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["created_by", "status", "-created_at"],
+                name="invoice_owner_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["created_by", "customer_email"], name="invoice_owner_email_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["reference_number"],
+                name="invoice_reference_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# (table, column) pairs searched with icontains by the search endpoint and
+# the admin. Django compiles icontains to UPPER(column::text) LIKE UPPER(...)
+# on Postgres, so the trigram indexes are built on that expression.
+TRIGRAM_INDEXES = [
+    ("invoices_invoice", "customer_name"),
+    ("invoices_invoice", "customer_email"),
+    ("invoices_invoice", "reference_number"),
+    ("invoices_invoiceitem", "description"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_{column}_trgm" ON "{table}" '
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_{column}_trgm"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0003_invoice_list_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_invoice_summary(apps, schema_editor):
+    Invoice = apps.get_model("invoices", "Invoice")
+    InvoiceSummary = apps.get_model("invoices", "InvoiceSummary")
+    rows = (
+        Invoice.objects.order_by()
+        .values("created_by", "status")
+        .annotate(invoice_count=Count("id"), total_amount=Sum("total_amount"))
+    )
+    InvoiceSummary.objects.bulk_create(
+        InvoiceSummary(
+            created_by_id=row["created_by"],
+            status=row["status"],
+            invoice_count=row["invoice_count"],
+            total_amount=row["total_amount"] or 0,
+        )
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0004_invoice_search_trigram_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InvoiceSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("paid", "Paid"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("invoice_count", models.IntegerField(default=0)),
+                (
+                    "total_amount",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="invoice_summaries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("created_by", "status"),
+                        name="invoice_summary_owner_status_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_invoice_summary, migrations.RunPython.noop),
+    ]
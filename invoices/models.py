@@ -1,4 +1,7 @@
-from django.db import models
+from collections import defaultdict
+from decimal import Decimal
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Sum
 from django.contrib.auth.models import User
 
 
@@ -22,14 +25,47 @@ class Invoice(models.Model):
         return f"{self.reference_number} - {self.customer_name}"
 
     def calculate_total(self):
-        """Calculate the total amount from invoice items"""
-        total = sum(item.total_price for item in self.items.all())
-        self.total_amount = total
-        self.save()
+        """Recalculate the total amount from the stored invoice items.
+
+        The API write paths set ``total_amount`` from the items they are
+        saving; this database-side aggregate is for edits that bypass them,
+        such as changing items in the admin. The change of amount is applied
+        to the owner's ``InvoiceSummary``.
+        """
+        total = self.items.aggregate(total=Sum("total_price"))["total"] or Decimal("0")
+        old_amount, self.total_amount = self.total_amount, total
+        with transaction.atomic():
+            self.save(update_fields=["total_amount", "updated_at"])
+            InvoiceSummary.record_change(
+                self.created_by_id, self.status, old_amount, self.status, total
+            )
         return total
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Backs the keyset pagination of a user's invoice list
+            models.Index(
+                fields=["created_by", "-created_at", "id"],
+                name="invoice_owner_created_idx",
+            ),
+            # Back the list filters
+            models.Index(
+                fields=["created_by", "status", "-created_at"],
+                name="invoice_owner_status_idx",
+            ),
+            models.Index(
+                fields=["created_by", "customer_email"],
+                name="invoice_owner_email_idx",
+            ),
+            # Lets Postgres serve reference number prefix (LIKE 'x%') lookups
+            # from an index regardless of the database collation
+            models.Index(
+                fields=["reference_number"],
+                name="invoice_reference_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
 
 
 class InvoiceItem(models.Model):
@@ -42,6 +78,116 @@ class InvoiceItem(models.Model):
     def __str__(self):
         return f"{self.description} - {self.invoice.reference_number}"
 
-    def save(self, *args, **kwargs):
+    def calculate_total_price(self):
+        """Calculate the line total without touching the database"""
         self.total_price = self.quantity * self.unit_price
+        return self.total_price
+
+    def save(self, *args, **kwargs):
+        self.calculate_total_price()
         super().save(*args, **kwargs)
+
+
+class InvoiceSummary(models.Model):
+    """Running count and amount of a user's invoices in one status.
+
+    Maintained incrementally by the API write paths so the dashboard can
+    read a user's totals without aggregating over all of their invoices.
+    ``manage.py rebuild_invoice_summary`` recomputes it from the invoices.
+    """
+
+    created_by = models.ForeignKey(
+        User, related_name="invoice_summaries", on_delete=models.CASCADE
+    )
+    status = models.CharField(max_length=20, choices=Invoice.STATUS_CHOICES)
+    invoice_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.created_by} - {self.status}"
+
+    @classmethod
+    def adjust(cls, created_by_id, deltas):
+        """Apply ``{status: (count_delta, amount_delta)}`` to a user's rows"""
+        for status, (count, amount) in deltas.items():
+            if not count and not amount:
+                continue
+            rows = cls.objects.filter(created_by_id=created_by_id, status=status)
+            changes = {
+                "invoice_count": F("invoice_count") + count,
+                "total_amount": F("total_amount") + amount,
+            }
+            if rows.update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        created_by_id=created_by_id,
+                        status=status,
+                        invoice_count=count,
+                        total_amount=amount,
+                    )
+            except IntegrityError:
+                # Another request created the row first
+                rows.update(**changes)
+
+    @classmethod
+    def record_invoices(cls, invoices, sign=1):
+        """Count invoices in (``sign=1``) or out of (``sign=-1``) the summary"""
+        deltas = defaultdict(lambda: defaultdict(lambda: [0, Decimal("0")]))
+        for invoice in invoices:
+            delta = deltas[invoice.created_by_id][invoice.status]
+            delta[0] += sign
+            delta[1] += sign * Decimal(invoice.total_amount)
+        for created_by_id, user_deltas in deltas.items():
+            cls.adjust(created_by_id, user_deltas)
+
+    @classmethod
+    def record_change(
+        cls, created_by_id, old_status, old_amount, new_status, new_amount
+    ):
+        """Move an invoice between statuses and/or amounts"""
+        deltas = defaultdict(lambda: [0, Decimal("0")])
+        deltas[old_status][0] -= 1
+        deltas[old_status][1] -= Decimal(old_amount)
+        deltas[new_status][0] += 1
+        deltas[new_status][1] += Decimal(new_amount)
+        cls.adjust(created_by_id, deltas)
+
+    @classmethod
+    def rebuild(cls, created_by_id=None):
+        """Recompute the summary rows from the invoices table"""
+        invoices = Invoice.objects.all()
+        rows = cls.objects.all()
+        if created_by_id is not None:
+            invoices = invoices.filter(created_by_id=created_by_id)
+            rows = rows.filter(created_by_id=created_by_id)
+
+        with transaction.atomic():
+            rows.delete()
+            cls.objects.bulk_create(
+                cls(
+                    created_by_id=row["created_by"],
+                    status=row["status"],
+                    invoice_count=row["invoice_count"],
+                    total_amount=row["total_amount"] or 0,
+                )
+                for row in cls.aggregate_invoices(invoices)
+            )
+
+    @staticmethod
+    def aggregate_invoices(invoices):
+        """Aggregate invoices into summary values per user and status"""
+        return (
+            invoices.order_by()
+            .values("created_by", "status")
+            .annotate(invoice_count=Count("id"), total_amount=Sum("total_amount"))
+        )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["created_by", "status"],
+                name="invoice_summary_owner_status_uniq",
+            ),
+        ]
@@ -0,0 +1,55 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvoiceCursorPagination(CursorPagination):
+    """Keyset pagination over a user's invoices, newest first.
+
+    The opaque cursor encodes the position in the ``(-created_at, id)``
+    ordering, so each page is a range scan on the matching index rather
+    than an OFFSET that grows with the page number.
+    """
+
+    ordering = ("-created_at", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class InvoiceSearchPagination(LimitOffsetPagination):
+    """Limit/offset pagination for ranked search results.
+
+    Ranked results cannot be keyset-paginated, so pages are sliced with
+    LIMIT/OFFSET. The total COUNT is skipped: one extra row is fetched to
+    tell whether a next page exists.
+    """
+
+    default_limit = 20
+    max_limit = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        results = list(queryset[self.offset : self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+        return results[: self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
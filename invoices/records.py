@@ -0,0 +1,153 @@
+"""Plain serialization of ``.values()`` rows for the read endpoints.
+
+A ModelSerializer runs a field object per value, which dominates the time to
+list or export thousands of rows. The functions here format selected rows
+directly into the same output as ``InvoiceSerializer`` and
+``TransactionSerializer``. ``?fields=`` picks the fields to return; leaving
+out ``items`` skips loading invoice items altogether, and so does the
+``?view=summary`` invoice list, which has item counts instead.
+"""
+
+from itertools import islice
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .models import InvoiceItem
+
+INVOICE_COLUMNS = [
+    "id",
+    "reference_number",
+    "customer_name",
+    "customer_email",
+    "total_amount",
+    "status",
+    "created_at",
+    "updated_at",
+]
+
+# The fields of InvoiceSerializer, in its order
+INVOICE_FIELDS = INVOICE_COLUMNS + ["items"]
+
+# The fields of the ``?view=summary`` list, with a count instead of the items
+INVOICE_SUMMARY_FIELDS = INVOICE_COLUMNS + ["item_count"]
+
+ITEM_COLUMNS = ["id", "description", "quantity", "unit_price", "total_price"]
+
+
+def parse_fields(params, allowed):
+    """Return the fields listed in ``?fields=``, in ``allowed`` order.
+
+    Without the parameter all of ``allowed`` are returned.
+    """
+    if not params.get("fields"):
+        return list(allowed)
+    requested = set(params["fields"].split(","))
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValidationError(
+            {"fields": f"Unknown fields: {', '.join(sorted(unknown))}"}
+        )
+    return [field for field in allowed if field in requested]
+
+
+def datetime_encoder():
+    """Return a function formatting datetimes the way DRF's DateTimeField does.
+
+    The current time zone is looked up once rather than for every value.
+    """
+    tz = timezone.get_current_timezone()
+
+    def encode(value):
+        value = value.astimezone(tz).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return encode
+
+
+def format_rows(rows, fields, formatters):
+    """Return a dict of ``fields`` per row, passing values through ``formatters``.
+
+    Decimal columns are formatted with ``str``: the database returns them
+    with exactly their declared two places, which is what DRF's
+    DecimalField quantizes to.
+    """
+    columns = [(field, formatters.get(field)) for field in fields]
+    return [
+        {
+            field: row[field] if format is None else format(row[field])
+            for field, format in columns
+        }
+        for row in rows
+    ]
+
+
+def with_item_count(invoices):
+    """Annotate invoices with their ``item_count``, without loading items.
+
+    The count is a correlated subquery rather than a join with GROUP BY, so
+    only the invoices of the page being read are counted.
+    """
+    counts = (
+        InvoiceItem.objects.filter(invoice=OuterRef("pk"))
+        .order_by()
+        .values("invoice")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return invoices.annotate(item_count=Coalesce(Subquery(counts), 0))
+
+
+def items_by_invoice(invoice_ids):
+    """Load the items of the given invoices in one query, grouped by invoice id"""
+    items = {pk: [] for pk in invoice_ids}
+    rows = (
+        InvoiceItem.objects.filter(invoice_id__in=invoice_ids)
+        .order_by("id")
+        .values_list("invoice_id", *ITEM_COLUMNS)
+    )
+    for invoice_id, pk, description, quantity, unit_price, total_price in rows:
+        items[invoice_id].append(
+            {
+                "id": pk,
+                "description": description,
+                "quantity": quantity,
+                "unit_price": str(unit_price),
+                "total_price": str(total_price),
+            }
+        )
+    return items
+
+
+def invoice_records(rows, fields=INVOICE_FIELDS):
+    """Format invoice ``rows`` selected with ``INVOICE_COLUMNS`` as dicts.
+
+    Items are loaded in one query for all rows, and only if ``fields``
+    includes them. Rows annotated by ``with_item_count`` can have their
+    ``item_count`` among the fields.
+    """
+    rows = list(rows)
+    encode_datetime = datetime_encoder()
+    records = format_rows(
+        rows,
+        [field for field in fields if field != "items"],
+        {
+            "total_amount": str,
+            "created_at": encode_datetime,
+            "updated_at": encode_datetime,
+        },
+    )
+    if "items" in fields:
+        items = items_by_invoice([row["id"] for row in rows])
+        for row, record in zip(rows, records):
+            record["items"] = items[row["id"]]
+    return records
+
+
+def chunked(iterable, size):
+    """Yield lists of up to ``size`` consecutive elements of ``iterable``"""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -0,0 +1,65 @@
+from django.db import connection
+from django.db.models import (
+    Case,
+    FloatField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from .models import InvoiceItem
+
+# Columns matched by the search endpoint, each backed on Postgres by a GIN
+# trigram index on UPPER(column) so that icontains lookups can use it
+INVOICE_SEARCH_FIELDS = ["customer_name", "customer_email", "reference_number"]
+ITEM_SEARCH_FIELDS = ["description"]
+
+
+def search_invoices(queryset, query):
+    """Filter invoices matching ``query`` and annotate them with a ``rank``.
+
+    An invoice matches when the query appears in one of its search fields or
+    in the description of one of its items. On Postgres the rank is the best
+    trigram similarity between the query and those fields; other databases
+    fall back to ranking exact and prefix matches above substring matches.
+    """
+    matches = Q()
+    for field in INVOICE_SEARCH_FIELDS:
+        matches |= Q(**{f"{field}__icontains": query})
+    matches |= Q(
+        pk__in=InvoiceItem.objects.filter(description__icontains=query).values(
+            "invoice_id"
+        )
+    )
+    queryset = queryset.filter(matches)
+
+    if connection.vendor == "postgresql":
+        rank = _trigram_rank(query)
+    else:
+        rank = Case(
+            When(reference_number__iexact=query, then=Value(1.0)),
+            When(reference_number__istartswith=query, then=Value(0.8)),
+            When(customer_name__istartswith=query, then=Value(0.6)),
+            When(customer_email__istartswith=query, then=Value(0.6)),
+            default=Value(0.3),
+            output_field=FloatField(),
+        )
+    return queryset.annotate(rank=rank).order_by("-rank", "-created_at", "id")
+
+
+def _trigram_rank(query):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    item_similarity = Subquery(
+        InvoiceItem.objects.filter(invoice=OuterRef("pk"))
+        .annotate(similarity=TrigramSimilarity("description", query))
+        .order_by("-similarity")
+        .values("similarity")[:1],
+        output_field=FloatField(),
+    )
+    return Greatest(
+        *(TrigramSimilarity(field, query) for field in INVOICE_SEARCH_FIELDS),
+        Coalesce(item_similarity, Value(0.0)),
+    )
@@ -1,19 +1,29 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Invoice, InvoiceItem
+from invoice_management.metrics import TimedListSerializer, TimedSerializerMixin
+from .caching import invalidate_invoice_cache
+from .models import Invoice, InvoiceItem, InvoiceSummary
+from .records import INVOICE_FIELDS, invoice_records
+from .transitions import STATUS_SOURCES, creation_transactions
+from transactions.models import Transaction
 
 
 class InvoiceItemSerializer(serializers.ModelSerializer):
+    # Writable so updates can refer to the existing items they change
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = InvoiceItem
         fields = ["id", "description", "quantity", "unit_price", "total_price"]
         read_only_fields = ["total_price"]
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = InvoiceItemSerializer(many=True)
 
     class Meta:
         model = Invoice
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "reference_number",
@@ -27,36 +37,215 @@ class InvoiceSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["created_at", "updated_at", "total_amount"]
 
+    def validate_items(self, value):
+        """Check that item ids refer to distinct items of the invoice being updated"""
+        item_ids = [item["id"] for item in value if item.get("id") is not None]
+        if self.instance is None or not item_ids:
+            return value
+
+        if len(item_ids) != len(set(item_ids)):
+            raise serializers.ValidationError("Each item id may only appear once.")
+
+        # Loaded once here and reused by update() to compute the diff
+        self._existing_items = {item.pk: item for item in self.instance.items.all()}
+        unknown = sorted(set(item_ids) - self._existing_items.keys())
+        if unknown:
+            raise serializers.ValidationError(
+                f"Items {unknown} do not belong to this invoice."
+            )
+        return value
+
     def create(self, validated_data):
         items_data = validated_data.pop("items", [])
-        invoice = Invoice(**validated_data)
-        invoice.save()
+        items = [
+            InvoiceItem(**{k: v for k, v in item_data.items() if k != "id"})
+            for item_data in items_data
+        ]
 
-        for item_data in items_data:
-            item = InvoiceItem(invoice=invoice, **item_data)
-            item.save()
+        # The total is known from the items being saved, so it goes out with
+        # the invoice INSERT instead of a follow-up SELECT and UPDATE
+        invoice = Invoice(
+            total_amount=sum(item.calculate_total_price() for item in items),
+            **validated_data,
+        )
 
-        # Calculate total amount
-        invoice.calculate_total()
+        with transaction.atomic():
+            invoice.save()
+            for item in items:
+                item.invoice = invoice
+            InvoiceItem.objects.bulk_create(items)
+            InvoiceSummary.record_invoices([invoice])
 
         return invoice
 
     def update(self, instance, validated_data):
         items_data = validated_data.pop("items", [])
+        old_status, old_amount = instance.status, instance.total_amount
 
         # Update invoice fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
 
-        # Clear existing items and create new ones
-        if items_data:
-            instance.items.all().delete()
-            for item_data in items_data:
+        with transaction.atomic():
+            if items_data:
+                instance.total_amount = self.update_items(instance, items_data)
+            instance.save()
+            InvoiceSummary.record_change(
+                instance.created_by_id,
+                old_status,
+                old_amount,
+                instance.status,
+                instance.total_amount,
+            )
+        invalidate_invoice_cache(instance.pk)
+
+        return instance
+
+    def update_items(self, instance, items_data):
+        """Apply the item payload as a diff against the stored items.
+
+        Items with an ``id`` are updated in place when they changed, items
+        without one are added and stored items missing from the payload are
+        removed, so the writes scale with what changed rather than with the
+        size of the invoice. Returns the new invoice total.
+        """
+        existing = getattr(self, "_existing_items", None)
+        if existing is None:
+            existing = {item.pk: item for item in instance.items.all()}
+
+        kept, changed, added = [], [], []
+        for item_data in items_data:
+            item_data = dict(item_data)
+            item = existing.get(item_data.pop("id", None))
+            if item is None:
                 item = InvoiceItem(invoice=instance, **item_data)
-                item.save()
+                added.append(item)
+            else:
+                kept.append(item)
+                if any(
+                    getattr(item, attr) != value for attr, value in item_data.items()
+                ):
+                    for attr, value in item_data.items():
+                        setattr(item, attr, value)
+                    changed.append(item)
+            item.calculate_total_price()
 
-            # Recalculate total amount
-            instance.calculate_total()
+        removed = existing.keys() - {item.pk for item in kept}
+        if removed:
+            InvoiceItem.objects.filter(pk__in=removed).delete()
+        if changed:
+            InvoiceItem.objects.bulk_update(
+                changed, ["description", "quantity", "unit_price", "total_price"]
+            )
+        if added:
+            InvoiceItem.objects.bulk_create(added)
 
-        return instance
+        return sum(item.total_price for item in kept + added)
+
+
+class InvoiceRowListSerializer(TimedListSerializer):
+    """Formats a page of invoice rows, loading their items in one query"""
+
+    def to_representation(self, data):
+        return invoice_records(data, self.child.field_names)
+
+
+class InvoiceRowSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """Read-only ``InvoiceSerializer`` output for rows from ``.values()``.
+
+    The rows must have the ``INVOICE_COLUMNS``. ``fields`` limits the
+    output to some of the ``INVOICE_FIELDS``.
+    """
+
+    def __init__(self, *args, fields=INVOICE_FIELDS, **kwargs):
+        self.field_names = fields
+        super().__init__(*args, **kwargs)
+
+    class Meta:
+        list_serializer_class = InvoiceRowListSerializer
+
+    def to_representation(self, row):
+        return invoice_records([row], self.field_names)[0]
+
+
+class InvoiceBulkListSerializer(serializers.ListSerializer):
+    """Writes a batch of validated invoices with one INSERT per table"""
+
+    batch_size = 500
+
+    @staticmethod
+    def split_new_references(entries):
+        """Split ``(key, validated_data)`` pairs on reference number uniqueness.
+
+        Returns the entries that can be inserted and those whose reference
+        number already exists or repeats an earlier entry, using one query
+        for the whole batch.
+        """
+        existing = set(
+            Invoice.objects.filter(
+                reference_number__in=[data["reference_number"] for _, data in entries]
+            ).values_list("reference_number", flat=True)
+        )
+        new, duplicates = [], []
+        for key, data in entries:
+            if data["reference_number"] in existing:
+                duplicates.append((key, data))
+            else:
+                existing.add(data["reference_number"])
+                new.append((key, data))
+        return new, duplicates
+
+    def create(self, validated_data):
+        invoices = []
+        items_per_invoice = []
+        for invoice_data in validated_data:
+            invoice_data = dict(invoice_data)
+            items = [
+                InvoiceItem(**{k: v for k, v in item_data.items() if k != "id"})
+                for item_data in invoice_data.pop("items")
+            ]
+            invoice_data["total_amount"] = sum(
+                item.calculate_total_price() for item in items
+            )
+            invoices.append(Invoice(**invoice_data))
+            items_per_invoice.append(items)
+
+        with transaction.atomic():
+            Invoice.objects.bulk_create(invoices, batch_size=self.batch_size)
+
+            items = []
+            for invoice, invoice_items in zip(invoices, items_per_invoice):
+                for item in invoice_items:
+                    item.invoice = invoice
+                    items.append(item)
+            InvoiceItem.objects.bulk_create(items, batch_size=self.batch_size)
+
+            Transaction.objects.bulk_create(
+                creation_transactions(invoices), batch_size=self.batch_size
+            )
+
+            InvoiceSummary.record_invoices(invoices)
+
+        return invoices
+
+
+class InvoiceBatchSerializer(InvoiceSerializer):
+    """Validates one invoice of a batch.
+
+    The uniqueness of ``reference_number`` is checked for the whole batch
+    at once by the caller instead of with one query per invoice.
+    """
+
+    reference_number = serializers.CharField(max_length=50)
+
+    class Meta(InvoiceSerializer.Meta):
+        list_serializer_class = InvoiceBulkListSerializer
+
+
+class InvoiceBulkStatusSerializer(serializers.Serializer):
+    """Validates a status change for a list of invoices"""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), min_length=1, max_length=1000
+    )
+    status = serializers.ChoiceField(choices=list(STATUS_SOURCES))
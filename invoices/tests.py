@@ -3,10 +3,26 @@ Tests for the invoices app.
 These tests will run on a test database which is automatically created and destroyed.
 """
 
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock, skipUnless
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
 from django.contrib.auth.models import User
-from django.db import IntegrityError
-from invoices.models import Invoice, InvoiceItem
+from django.db import IntegrityError, connection
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from invoice_management.testing import QueryBudgetMixin, query_budget
+from invoices.management.commands.import_invoices import read_records
+from invoices.models import Invoice, InvoiceItem, InvoiceSummary
+from invoices.records import INVOICE_COLUMNS
+from invoices.serializers import InvoiceRowSerializer, InvoiceSerializer
 from transactions.models import Transaction
 
 
@@ -491,7 +507,7 @@ class UserInvoiceAccessTest(TestCase):
         self.assertEqual(response.status_code, 200)
 
         # Check that user1 only sees their own invoice
-        data = response.json()
+        data = response.json()["results"]
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]["id"], self.invoice1.pk)
         self.assertEqual(data[0]["reference_number"], "INV-013")
@@ -562,3 +578,1962 @@ class UserInvoiceAccessTest(TestCase):
         # Verify user1's invoice status is unchanged
         self.invoice1.refresh_from_db()
         self.assertEqual(self.invoice1.status, "pending")  # Should still be pending
+
+
+class InvoiceListQueryCountTest(APITestCase):
+    """Test cases for keeping the invoice list query count constant"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_invoices(self, invoice_count, item_count):
+        """Create invoices with the given number of items each"""
+        start = Invoice.objects.count()
+        for i in range(start, start + invoice_count):
+            invoice = Invoice.objects.create(
+                reference_number=f"INV-Q{i:03d}",
+                customer_name="Test Customer",
+                customer_email="customer@example.com",
+                created_by=self.user,
+            )
+            for j in range(item_count):
+                InvoiceItem.objects.create(
+                    invoice=invoice,
+                    description=f"Item {j}",
+                    quantity=1,
+                    unit_price=10.00,
+                )
+
+    def test_list_query_count_is_constant(self):
+        """Test that listing invoices does not issue one query per invoice"""
+        self.create_invoices(invoice_count=1, item_count=1)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/invoices/")
+        self.assertEqual(response.status_code, 200)
+
+        self.create_invoices(invoice_count=10, item_count=5)
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/invoices/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 11)
+
+
+class InvoicePaginationTest(APITestCase):
+    """Test cases for cursor pagination of the invoice list"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        for i in range(5):
+            Invoice.objects.create(
+                reference_number=f"INV-P{i:03d}",
+                customer_name="Test Customer",
+                customer_email="customer@example.com",
+                created_by=self.user,
+            )
+
+    def test_cursor_pages_cover_all_invoices_once(self):
+        """Test that following the next links walks every invoice exactly once"""
+        seen = []
+        url = "/api/invoices/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data["results"]), 2)
+            seen.extend(invoice["id"] for invoice in data["results"])
+            url = data["next"]
+
+        expected = list(
+            Invoice.objects.order_by("-created_at", "id").values_list("pk", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_page_query_count_is_constant_at_depth(self):
+        """Test that deep pages cost the same number of queries as the first"""
+        response = self.client.get("/api/invoices/?page_size=1")
+        next_url = response.json()["next"]
+        for _ in range(3):
+            next_url = self.client.get(next_url).json()["next"]
+
+        with self.assertNumQueries(2):
+            response = self.client.get(next_url)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+
+class InvoiceBulkCreateTest(APITestCase):
+    """Test cases for the bulk invoice creation endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def invoice_payload(self, reference_number, item_count=2):
+        """Build the request payload for one invoice"""
+        return {
+            "reference_number": reference_number,
+            "customer_name": "Test Customer",
+            "customer_email": "customer@example.com",
+            "items": [
+                {"description": f"Item {i}", "quantity": 2, "unit_price": "12.50"}
+                for i in range(item_count)
+            ],
+        }
+
+    def test_single_and_bulk_creation_record_the_same_ledger(self):
+        """Test that paid and pending invoices get the same transactions either way"""
+        for status_name in ("paid", "pending"):
+            single = {**self.invoice_payload(f"INV-S-{status_name}")}
+            bulk = {**self.invoice_payload(f"INV-B-{status_name}")}
+            single["status"] = bulk["status"] = status_name
+            response = self.client.post("/api/invoices/", single, format="json")
+            self.assertEqual(response.status_code, 201)
+            response = self.client.post(
+                "/api/invoices/bulk/", {"invoices": [bulk]}, format="json"
+            )
+            self.assertEqual(response.status_code, 201)
+
+            ledgers = [
+                sorted(
+                    Transaction.objects.filter(
+                        invoice__reference_number=reference_number
+                    ).values_list("transaction_type", "amount")
+                )
+                for reference_number in (
+                    f"INV-S-{status_name}",
+                    f"INV-B-{status_name}",
+                )
+            ]
+            self.assertEqual(ledgers[0], ledgers[1])
+            expected = ["payment", "sale"] if status_name == "paid" else ["sale"]
+            self.assertEqual([row[0] for row in ledgers[0]], expected)
+
+    def test_bulk_create_invoices(self):
+        """Test creating invoices, items and sale transactions in one request"""
+        payload = {
+            "invoices": [self.invoice_payload(f"INV-B{i:03d}") for i in range(3)]
+        }
+        response = self.client.post("/api/invoices/bulk/", payload, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(len(data["created"]), 3)
+        self.assertEqual(data["errors"], [])
+
+        invoice = Invoice.objects.get(reference_number="INV-B001")
+        self.assertEqual(invoice.created_by, self.user)
+        self.assertEqual(invoice.total_amount, 50.00)
+        self.assertEqual(invoice.items.count(), 2)
+        self.assertEqual(invoice.items.first().total_price, 25.00)
+
+        sale = Transaction.objects.get(invoice=invoice)
+        self.assertEqual(sale.transaction_type, "sale")
+        self.assertEqual(sale.amount, 50.00)
+
+    def test_bulk_create_reports_errors_per_invoice(self):
+        """Test that invalid invoices are reported without aborting the batch"""
+        Invoice.objects.create(
+            reference_number="INV-EXISTING",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            created_by=self.user,
+        )
+        invalid = self.invoice_payload("INV-B002")
+        invalid["customer_email"] = "not-an-email"
+        payload = {
+            "invoices": [
+                self.invoice_payload("INV-B001"),
+                invalid,
+                self.invoice_payload("INV-EXISTING"),
+                self.invoice_payload("INV-B001"),
+            ]
+        }
+        response = self.client.post("/api/invoices/bulk/", payload, format="json")
+
+        self.assertEqual(response.status_code, 207)
+        data = response.json()
+        self.assertEqual([created["index"] for created in data["created"]], [0])
+        self.assertEqual([error["index"] for error in data["errors"]], [1, 2, 3])
+        self.assertIn("customer_email", data["errors"][0]["errors"])
+        self.assertIn("reference_number", data["errors"][1]["errors"])
+        self.assertIn("reference_number", data["errors"][2]["errors"])
+        self.assertTrue(Invoice.objects.filter(reference_number="INV-B001").exists())
+
+    def test_bulk_create_rejects_empty_batch(self):
+        """Test that an empty batch is rejected"""
+        response = self.client.post(
+            "/api/invoices/bulk/", {"invoices": []}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_create_query_count_is_constant(self):
+        """Test that the number of queries does not grow with the batch size"""
+        InvoiceSummary.objects.create(created_by=self.user, status="pending")
+        payload = {
+            "invoices": [self.invoice_payload(f"INV-S{i:03d}") for i in range(2)]
+        }
+        with self.assertNumQueries(7):
+            self.client.post("/api/invoices/bulk/", payload, format="json")
+
+        payload = {
+            "invoices": [
+                self.invoice_payload(f"INV-L{i:03d}", item_count=5) for i in range(20)
+            ]
+        }
+        with self.assertNumQueries(7):
+            response = self.client.post("/api/invoices/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(InvoiceItem.objects.count(), 104)
+
+
+class InvoiceWriteQueryCountTest(APITestCase):
+    """Test cases for the number of round trips per invoice write"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def invoice_payload(self, reference_number, item_count):
+        """Build the request payload for one invoice"""
+        return {
+            "reference_number": reference_number,
+            "customer_name": "Test Customer",
+            "customer_email": "customer@example.com",
+            "items": [
+                {"description": f"Item {i}", "quantity": 3, "unit_price": "10.00"}
+                for i in range(item_count)
+            ],
+        }
+
+    def test_create_query_count_does_not_grow_with_items(self):
+        """Test that creating an invoice writes its total with the INSERT"""
+        InvoiceSummary.objects.create(created_by=self.user, status="pending")
+        for reference_number, item_count in (("INV-W001", 1), ("INV-W002", 25)):
+            # Uniqueness check, savepoint, invoice INSERT, items INSERT, summary
+            # UPDATE, savepoint release, sale INSERT and the response's items
+            with self.assertNumQueries(8):
+                response = self.client.post(
+                    "/api/invoices/",
+                    self.invoice_payload(reference_number, item_count),
+                    format="json",
+                )
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(response.json()["total_amount"], f"{30 * item_count:.2f}")
+
+        invoice = Invoice.objects.get(reference_number="INV-W002")
+        self.assertEqual(invoice.total_amount, 750.00)
+        self.assertEqual(invoice.items.count(), 25)
+
+    def test_update_sets_total_from_payload(self):
+        """Test that updating items stores the total computed from the payload"""
+        response = self.client.post(
+            "/api/invoices/", self.invoice_payload("INV-W003", 2), format="json"
+        )
+        invoice_id = response.json()["id"]
+
+        response = self.client.put(
+            f"/api/invoices/{invoice_id}/",
+            self.invoice_payload("INV-W003", 4),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        invoice = Invoice.objects.get(pk=invoice_id)
+        self.assertEqual(invoice.total_amount, 120.00)
+        self.assertEqual(invoice.items.count(), 4)
+
+    def test_calculate_total_aggregates_in_database(self):
+        """Test that calculate_total sums items with a single aggregate query"""
+        invoice = Invoice.objects.create(
+            reference_number="INV-W004",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            created_by=self.user,
+        )
+        for quantity in (1, 2, 3):
+            InvoiceItem.objects.create(
+                invoice=invoice, description="Item", quantity=quantity, unit_price=5
+            )
+        InvoiceSummary.objects.create(created_by=self.user, status="pending")
+
+        # The aggregate, then the invoice and summary UPDATEs in a savepoint
+        with self.assertNumQueries(5):
+            total = invoice.calculate_total()
+
+        self.assertEqual(total, 30.00)
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.total_amount, 30.00)
+
+
+class InvoiceItemDiffUpdateTest(APITestCase):
+    """Test cases for updating invoice items as a diff keyed by item id"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference_number="INV-D001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            created_by=self.user,
+        )
+        self.items = [
+            InvoiceItem.objects.create(
+                invoice=self.invoice,
+                description=f"Item {i}",
+                quantity=1,
+                unit_price=10.00,
+            )
+            for i in range(3)
+        ]
+
+    def payload(self, items):
+        """Build the PUT payload for the invoice with the given items"""
+        return {
+            "reference_number": "INV-D001",
+            "customer_name": "Test Customer",
+            "customer_email": "customer@example.com",
+            "items": items,
+        }
+
+    def item_payload(self, item, **changes):
+        """Build the payload for an existing item"""
+        data = {
+            "id": item.pk,
+            "description": item.description,
+            "quantity": item.quantity,
+            "unit_price": "10.00",
+        }
+        data.update(changes)
+        return data
+
+    def test_update_applies_item_diff(self):
+        """Test that items are updated, added and removed by id"""
+        items = [
+            self.item_payload(self.items[0]),
+            self.item_payload(self.items[1], quantity=4),
+            {"description": "New Item", "quantity": 2, "unit_price": "5.00"},
+        ]
+        response = self.client.put(
+            f"/api/invoices/{self.invoice.pk}/", self.payload(items), format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        stored = {item.pk: item for item in self.invoice.items.all()}
+        self.assertEqual(len(stored), 3)
+        self.assertIn(self.items[0].pk, stored)
+        self.assertEqual(stored[self.items[1].pk].quantity, 4)
+        self.assertEqual(stored[self.items[1].pk].total_price, 40.00)
+        self.assertNotIn(self.items[2].pk, stored)
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.total_amount, 60.00)
+        self.assertEqual(response.json()["total_amount"], "60.00")
+
+    def test_unchanged_items_are_not_written(self):
+        """Test that an update touching one item issues a single item write"""
+        self.invoice.calculate_total()
+        InvoiceSummary.rebuild()
+        items = [self.item_payload(item) for item in self.items]
+        items[0]["description"] = "Renamed"
+
+        # Invoice lookup, uniqueness check, existing items, savepoint, item
+        # UPDATE, invoice UPDATE, savepoint release and the response's items
+        with self.assertNumQueries(8):
+            response = self.client.put(
+                f"/api/invoices/{self.invoice.pk}/",
+                self.payload(items),
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            InvoiceItem.objects.get(pk=self.items[0].pk).description, "Renamed"
+        )
+
+    def test_update_rejects_items_of_other_invoices(self):
+        """Test that item ids must belong to the invoice being updated"""
+        other = Invoice.objects.create(
+            reference_number="INV-D002",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            created_by=self.user,
+        )
+        other_item = InvoiceItem.objects.create(
+            invoice=other, description="Other", quantity=1, unit_price=10.00
+        )
+
+        items = [self.item_payload(other_item)]
+        response = self.client.put(
+            f"/api/invoices/{self.invoice.pk}/", self.payload(items), format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("items", response.json())
+        self.assertEqual(self.invoice.items.count(), 3)
+
+
+class InvoiceListFilterTest(APITestCase):
+    """Test cases for filtering and ordering the invoice list"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoices = [
+            Invoice.objects.create(
+                reference_number=reference_number,
+                customer_name="Test Customer",
+                customer_email=customer_email,
+                total_amount=total_amount,
+                status=invoice_status,
+                created_by=self.user,
+            )
+            for reference_number, customer_email, total_amount, invoice_status in (
+                ("ACME-001", "a@example.com", 50.00, "pending"),
+                ("ACME-002", "b@example.com", 150.00, "paid"),
+                ("GLOBEX-001", "a@example.com", 250.00, "cancelled"),
+            )
+        ]
+
+    def get_references(self, query):
+        """Return the reference numbers listed for the query string"""
+        response = self.client.get(f"/api/invoices/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return [invoice["reference_number"] for invoice in response.json()["results"]]
+
+    def test_filter_by_status(self):
+        """Test filtering by one or more statuses"""
+        self.assertEqual(self.get_references("status=paid"), ["ACME-002"])
+        self.assertEqual(
+            sorted(self.get_references("status=paid,cancelled")),
+            ["ACME-002", "GLOBEX-001"],
+        )
+
+    def test_filter_by_customer_email_and_reference_prefix(self):
+        """Test filtering by customer email and reference number prefix"""
+        self.assertEqual(
+            sorted(self.get_references("customer_email=a@example.com")),
+            ["ACME-001", "GLOBEX-001"],
+        )
+        self.assertEqual(
+            sorted(self.get_references("reference_number=ACME")),
+            ["ACME-001", "ACME-002"],
+        )
+
+    def test_filter_by_amount_and_date_range(self):
+        """Test filtering by total amount and creation date bounds"""
+        self.assertEqual(
+            self.get_references("min_amount=100&max_amount=200"), ["ACME-002"]
+        )
+        self.assertEqual(len(self.get_references("created_after=2000-01-01")), 3)
+        self.assertEqual(self.get_references("created_before=2000-01-01"), [])
+
+    def test_ordering(self):
+        """Test ordering the list by total amount"""
+        self.assertEqual(
+            self.get_references("ordering=-total_amount"),
+            ["GLOBEX-001", "ACME-002", "ACME-001"],
+        )
+
+    def test_invalid_filters_are_rejected(self):
+        """Test that malformed filter values return a 400"""
+        for query in (
+            "status=unknown",
+            "min_amount=abc",
+            "min_amount=NaN",
+            "min_amount=sNaN",
+            "max_amount=Infinity",
+            "max_amount=-Infinity",
+            "created_after=yesterday",
+        ):
+            response = self.client.get(f"/api/invoices/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are Postgres specific")
+class InvoiceListFilterPlanTest(TestCase):
+    """Test cases checking that list filters are served by indexes"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        # Enough invoices of one user, in varied statuses, emails and
+        # references, that filtering on the owner alone is not selective
+        Invoice.objects.bulk_create(
+            Invoice(
+                reference_number=f"REF-{i:04d}",
+                customer_name="Test Customer",
+                customer_email=f"customer{i % 50}@example.com",
+                status=("pending", "paid", "cancelled")[i % 3],
+                created_by=self.user,
+            )
+            for i in range(1000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE invoices_invoice")
+            # The test tables are small, so make the planner prefer an index
+            # over a sequential scan
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute(
+                "SELECT datcollate FROM pg_database "
+                "WHERE datname = current_database()"
+            )
+            self.collation = cursor.fetchone()[0]
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def assertUsesIndex(self, queryset, index):
+        """Assert that the query plan reads the invoices through ``index``.
+
+        ``index`` is a regular expression matched against the plan.
+        """
+        plan = queryset.explain()
+        self.assertNotIn("Seq Scan on invoices_invoice", plan, plan)
+        self.assertRegex(plan, rf"(using|Bitmap Index Scan on) {index}\b", plan)
+
+    def test_filters_use_indexes(self):
+        """Test that each list filter is backed by its own index"""
+        invoices = Invoice.objects.filter(created_by=self.user)
+        self.assertUsesIndex(
+            invoices.order_by("-created_at", "id")[:50], "invoice_owner_created_idx"
+        )
+        self.assertUsesIndex(
+            invoices.filter(status="paid").order_by("-created_at")[:50],
+            "invoice_owner_status_idx",
+        )
+        self.assertUsesIndex(
+            invoices.filter(customer_email="customer7@example.com"),
+            "invoice_owner_email_idx",
+        )
+        # Django gives the unique reference_number its own varchar_pattern_ops
+        # "_like" index, equivalent to invoice_reference_prefix_idx; with the
+        # C collation the unique index serves prefixes as well
+        prefix_indexes = r"invoice_reference_prefix_idx|\w+_reference_number_\w+_like"
+        if self.collation in ("C", "POSIX"):
+            prefix_indexes += r"|invoices_invoice_reference_number_key"
+        self.assertUsesIndex(
+            invoices.filter(reference_number__startswith="REF-001"),
+            f"({prefix_indexes})",
+        )
+
+
+class InvoiceSearchTest(APITestCase):
+    """Test cases for the invoice search endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.other_user = User.objects.create_user(
+            username="otheruser", email="other@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.acme = Invoice.objects.create(
+            reference_number="ACME-001",
+            customer_name="Acme Corp",
+            customer_email="billing@acme.com",
+            created_by=self.user,
+        )
+        self.globex = Invoice.objects.create(
+            reference_number="GLOBEX-001",
+            customer_name="Globex",
+            customer_email="billing@globex.com",
+            created_by=self.user,
+        )
+        InvoiceItem.objects.create(
+            invoice=self.globex,
+            description="Acme anvil",
+            quantity=1,
+            unit_price=10.00,
+        )
+        Invoice.objects.create(
+            reference_number="ACME-002",
+            customer_name="Acme Corp",
+            customer_email="billing@acme.com",
+            created_by=self.other_user,
+        )
+
+    def test_search_matches_invoice_fields_and_items(self):
+        """Test that search matches customer fields and item descriptions"""
+        response = self.client.get("/api/invoices/search/?q=acme")
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()["results"]
+        self.assertEqual(
+            [invoice["id"] for invoice in results], [self.acme.pk, self.globex.pk]
+        )
+
+    def test_search_ranks_reference_matches_first(self):
+        """Test that an exact reference number match is ranked first"""
+        response = self.client.get("/api/invoices/search/?q=GLOBEX-001")
+        results = response.json()["results"]
+        self.assertEqual(results[0]["id"], self.globex.pk)
+
+    def test_search_is_paginated(self):
+        """Test that search results are paginated without a count"""
+        response = self.client.get("/api/invoices/search/?q=acme&limit=1")
+        data = response.json()
+        self.assertEqual(len(data["results"]), 1)
+        self.assertNotIn("count", data)
+
+        response = self.client.get(data["next"])
+        data = response.json()
+        self.assertEqual(data["results"][0]["id"], self.globex.pk)
+        self.assertIsNone(data["next"])
+
+    def test_search_requires_query(self):
+        """Test that short queries are rejected"""
+        response = self.client.get("/api/invoices/search/?q=ac")
+        self.assertEqual(response.status_code, 400)
+
+
+class InvoiceSummaryTest(APITestCase):
+    """Test cases for the per-user invoice summary counters"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_invoice(self, reference_number, unit_price="10.00"):
+        """Create an invoice with one item through the API"""
+        response = self.client.post(
+            "/api/invoices/",
+            {
+                "reference_number": reference_number,
+                "customer_name": "Test Customer",
+                "customer_email": "customer@example.com",
+                "items": [
+                    {"description": "Item", "quantity": 1, "unit_price": unit_price}
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    def get_summary(self):
+        """Fetch the summary for the current user"""
+        response = self.client.get("/api/invoices/summary/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_summary_follows_write_paths(self):
+        """Test that create, mark-paid, mark-pending and delete update the summary"""
+        first = self.create_invoice("INV-S001", "10.00")
+        second = self.create_invoice("INV-S002", "25.00")
+        summary = self.get_summary()
+        self.assertEqual(summary["pending"], {"count": 2, "total_amount": "35.00"})
+        self.assertEqual(summary["paid"], {"count": 0, "total_amount": "0.00"})
+
+        self.client.patch(f"/api/invoices/{first}/mark-paid/")
+        summary = self.get_summary()
+        self.assertEqual(summary["pending"], {"count": 1, "total_amount": "25.00"})
+        self.assertEqual(summary["paid"], {"count": 1, "total_amount": "10.00"})
+
+        self.client.patch(f"/api/invoices/{first}/mark-pending/")
+        self.client.delete(f"/api/invoices/{second}/")
+        summary = self.get_summary()
+        self.assertEqual(summary["pending"], {"count": 1, "total_amount": "10.00"})
+        self.assertEqual(summary["paid"], {"count": 0, "total_amount": "0.00"})
+
+    def test_summary_follows_updates_and_bulk_creation(self):
+        """Test that updates and bulk creation update the summary"""
+        invoice_id = self.create_invoice("INV-S003", "10.00")
+        self.client.put(
+            f"/api/invoices/{invoice_id}/",
+            {
+                "reference_number": "INV-S003",
+                "customer_name": "Test Customer",
+                "customer_email": "customer@example.com",
+                "status": "cancelled",
+                "items": [
+                    {"description": "Item", "quantity": 4, "unit_price": "10.00"}
+                ],
+            },
+            format="json",
+        )
+        self.client.post(
+            "/api/invoices/bulk/",
+            {
+                "invoices": [
+                    {
+                        "reference_number": "INV-S004",
+                        "customer_name": "Test Customer",
+                        "customer_email": "customer@example.com",
+                        "items": [
+                            {"description": "Item", "quantity": 1, "unit_price": "5.00"}
+                        ],
+                    }
+                ]
+            },
+            format="json",
+        )
+
+        summary = self.get_summary()
+        self.assertEqual(summary["pending"], {"count": 1, "total_amount": "5.00"})
+        self.assertEqual(summary["cancelled"], {"count": 1, "total_amount": "40.00"})
+
+    def test_summary_read_is_a_single_query(self):
+        """Test that reading the summary does not aggregate over invoices"""
+        for i in range(5):
+            self.create_invoice(f"INV-S1{i:02d}")
+        with self.assertNumQueries(1):
+            self.get_summary()
+
+    def test_rebuild_command_repairs_drift(self):
+        """Test that the management command detects and repairs drift"""
+        self.create_invoice("INV-S005")
+        # Writes that bypass the API leave the counters behind
+        Invoice.objects.create(
+            reference_number="INV-S006",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            total_amount=5.00,
+            created_by=self.user,
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_invoice_summary", "--verify", stdout=StringIO())
+
+        call_command("rebuild_invoice_summary", stdout=StringIO())
+        call_command("rebuild_invoice_summary", "--verify", stdout=StringIO())
+        self.assertEqual(
+            self.get_summary()["pending"], {"count": 2, "total_amount": "15.00"}
+        )
+
+
+class InvoiceAdminSummaryTest(TestCase):
+    """Test cases for the invoice summary after edits made in the admin"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="adminpass123"
+        )
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_login(self.admin)
+
+    def summary(self, user=None):
+        """Return ``{status: (count, total_amount)}`` for a user's summary rows"""
+        return {
+            row.status: (row.invoice_count, f"{row.total_amount:.2f}")
+            for row in InvoiceSummary.objects.filter(created_by=user or self.user)
+            if row.invoice_count or row.total_amount
+        }
+
+    def assert_summary_matches_invoices(self):
+        """Assert that the running totals equal a rebuild from the invoices"""
+        call_command("rebuild_invoice_summary", "--verify", stdout=StringIO())
+
+    def invoice_form(self, reference_number, status="pending", user=None, items=()):
+        """Build the admin form data for an invoice and its inline items"""
+        data = {
+            "reference_number": reference_number,
+            "customer_name": "Test Customer",
+            "customer_email": "customer@example.com",
+            "total_amount": "0",
+            "status": status,
+            "created_by": (user or self.user).pk,
+            "items-TOTAL_FORMS": len(items),
+            "items-INITIAL_FORMS": 0,
+            "items-MIN_NUM_FORMS": 0,
+            "items-MAX_NUM_FORMS": 1000,
+        }
+        for i, (quantity, unit_price) in enumerate(items):
+            data.update(
+                {
+                    f"items-{i}-description": f"Item {i}",
+                    f"items-{i}-quantity": quantity,
+                    f"items-{i}-unit_price": unit_price,
+                }
+            )
+        return data
+
+    def add_invoice(self, reference_number, items=((1, "10.00"),)):
+        """Create an invoice with items through the admin"""
+        response = self.client.post(
+            reverse("admin:invoices_invoice_add"),
+            self.invoice_form(reference_number, items=items),
+        )
+        self.assertEqual(response.status_code, 302)
+        return Invoice.objects.get(reference_number=reference_number)
+
+    def test_add_and_change_update_the_summary(self):
+        """Test that adding an invoice and changing its status are counted"""
+        invoice = self.add_invoice("INV-A001", items=[(2, "10.00"), (1, "5.00")])
+        self.assertEqual(self.summary(), {"pending": (1, "25.00")})
+
+        response = self.client.post(
+            reverse("admin:invoices_invoice_change", args=[invoice.pk]),
+            self.invoice_form("INV-A001", status="cancelled", items=[(1, "3.00")]),
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.summary(), {"cancelled": (1, "28.00")})
+        self.assert_summary_matches_invoices()
+
+    def test_moving_an_invoice_to_another_user(self):
+        """Test that changing the owner moves the invoice between summaries"""
+        other = User.objects.create_user(username="other", password="otherpass123")
+        invoice = self.add_invoice("INV-A002")
+
+        response = self.client.post(
+            reverse("admin:invoices_invoice_change", args=[invoice.pk]),
+            self.invoice_form("INV-A002", user=other) | {"total_amount": "10.00"},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.summary(), {})
+        self.assertEqual(self.summary(other), {"pending": (1, "10.00")})
+        self.assert_summary_matches_invoices()
+
+    def test_deletes_update_the_summary(self):
+        """Test that deleting one invoice or a selection is counted"""
+        first = self.add_invoice("INV-A003")
+        second = self.add_invoice("INV-A004", items=[(1, "20.00")])
+        third = self.add_invoice("INV-A005", items=[(1, "30.00")])
+
+        response = self.client.post(
+            reverse("admin:invoices_invoice_delete", args=[first.pk]), {"post": "yes"}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.summary(), {"pending": (2, "50.00")})
+
+        response = self.client.post(
+            reverse("admin:invoices_invoice_changelist"),
+            {
+                "action": "delete_selected",
+                "_selected_action": [second.pk, third.pk],
+                "post": "yes",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.summary(), {})
+        self.assert_summary_matches_invoices()
+
+    def test_item_edits_update_the_summary(self):
+        """Test that adding and deleting items in the item admin is counted"""
+        invoice = self.add_invoice("INV-A006")
+        response = self.client.post(
+            reverse("admin:invoices_invoiceitem_add"),
+            {
+                "invoice": invoice.pk,
+                "description": "Extra",
+                "quantity": 3,
+                "unit_price": "4.00",
+                "total_price": "0",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.summary(), {"pending": (1, "22.00")})
+
+        response = self.client.post(
+            reverse("admin:invoices_invoiceitem_changelist"),
+            {
+                "action": "delete_selected",
+                "_selected_action": list(invoice.items.values_list("pk", flat=True)),
+                "post": "yes",
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.summary(), {"pending": (1, "0.00")})
+        self.assert_summary_matches_invoices()
+
+    def test_calculate_total_updates_the_summary(self):
+        """Test that re-aggregating a total moves the summary amount with it"""
+        invoice = self.add_invoice("INV-A007")
+        InvoiceItem.objects.create(
+            invoice=invoice, description="Extra", quantity=1, unit_price=7
+        )
+        invoice.calculate_total()
+        self.assertEqual(self.summary(), {"pending": (1, "17.00")})
+        self.assert_summary_matches_invoices()
+
+
+class InvoiceExportTest(APITestCase):
+    """Test cases for streaming invoice exports"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference_number="INV-E001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            total_amount=25.00,
+            created_by=self.user,
+        )
+        for description in ("Item 1", "Item 2"):
+            InvoiceItem.objects.create(
+                invoice=self.invoice,
+                description=description,
+                quantity=1,
+                unit_price=12.50,
+            )
+        Invoice.objects.create(
+            reference_number="INV-E002",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            created_by=self.user,
+        )
+        other_user = User.objects.create_user(
+            username="otheruser", email="other@example.com", password="testpass123"
+        )
+        Invoice.objects.create(
+            reference_number="INV-E003",
+            customer_name="Other Customer",
+            customer_email="other@example.com",
+            created_by=other_user,
+        )
+
+    def read_streaming(self, response):
+        """Join the content of a streaming response"""
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_has_one_row_per_item(self):
+        """Test that the CSV export joins items to their invoices"""
+        response = self.client.get("/api/invoices/export/?format=csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/csv"))
+
+        rows = list(csv.reader(self.read_streaming(response).splitlines()))
+        self.assertEqual(rows[0][:2], ["invoice_id", "reference_number"])
+        self.assertEqual(
+            [(row[1], row[9]) for row in rows[1:]],
+            [("INV-E001", "Item 1"), ("INV-E001", "Item 2"), ("INV-E002", "")],
+        )
+
+    def test_ndjson_export_matches_serializer(self):
+        """Test that NDJSON records have the same shape as the API"""
+        response = self.client.get("/api/invoices/export/?format=ndjson")
+        self.assertEqual(response.status_code, 200)
+
+        records = [
+            json.loads(line) for line in self.read_streaming(response).splitlines()
+        ]
+        self.assertEqual(len(records), 2)
+        detail = self.client.get(f"/api/invoices/{self.invoice.pk}/").json()
+        self.assertEqual(records[0], detail)
+
+    def test_export_applies_list_filters(self):
+        """Test that the export honours the list filters"""
+        response = self.client.get(
+            "/api/invoices/export/?format=ndjson&reference_number=INV-E002"
+        )
+        records = self.read_streaming(response).splitlines()
+        self.assertEqual(len(records), 1)
+        self.assertEqual(json.loads(records[0])["reference_number"], "INV-E002")
+
+
+class InvoiceImportCommandTest(TestCase):
+    """Test cases for the import_invoices management command"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_file(self, name, content):
+        """Write an import file and return its path"""
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def write_ndjson(self, records):
+        """Write invoice records as NDJSON"""
+        return self.write_file(
+            "invoices.ndjson", "".join(json.dumps(record) + "\n" for record in records)
+        )
+
+    def make_record(self, reference_number, amount="10.00"):
+        """Build an invoice record with a single item"""
+        return {
+            "reference_number": reference_number,
+            "customer_name": "Test Customer",
+            "customer_email": "customer@example.com",
+            "items": [{"description": "Item", "quantity": 1, "unit_price": amount}],
+        }
+
+    def run_import(self, path, *args):
+        """Run the import command and return its output"""
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "import_invoices",
+            path,
+            "--user",
+            "testuser",
+            *args,
+            stdout=stdout,
+            stderr=stderr,
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_ndjson_in_batches(self):
+        """Test that NDJSON records are imported with totals and sales"""
+        path = self.write_ndjson(
+            [self.make_record(f"INV-I{i:03d}", f"{i}.00") for i in range(1, 6)]
+        )
+        stdout, _ = self.run_import(path, "--batch-size", "2")
+
+        self.assertIn("Imported 5 invoices, skipped 0 existing, 0 failed", stdout)
+        self.assertIn("[worker 0] next offset: 5", stdout)
+        invoice = Invoice.objects.get(reference_number="INV-I003")
+        self.assertEqual(invoice.created_by, self.user)
+        self.assertEqual(invoice.total_amount, 3)
+        self.assertEqual(invoice.items.count(), 1)
+        self.assertEqual(Transaction.objects.filter(created_by=self.user).count(), 5)
+        self.assertEqual(
+            InvoiceSummary.objects.get(
+                created_by=self.user, status="pending"
+            ).invoice_count,
+            5,
+        )
+
+    def test_paid_invoices_get_their_payment(self):
+        """Test that invoices imported as paid get a sale and a payment"""
+        path = self.write_ndjson(
+            [
+                {**self.make_record("INV-I101", "12.00"), "status": "paid"},
+                self.make_record("INV-I102", "5.00"),
+            ]
+        )
+        self.run_import(path)
+
+        self.assertEqual(
+            sorted(
+                Transaction.objects.values_list(
+                    "invoice__reference_number", "transaction_type", "amount"
+                )
+            ),
+            [
+                ("INV-I101", "payment", 12),
+                ("INV-I101", "sale", 12),
+                ("INV-I102", "sale", 5),
+            ],
+        )
+
+    def test_import_skips_existing_and_reports_invalid_records(self):
+        """Test that re-runs skip imported invoices and bad records fail"""
+        Invoice.objects.create(
+            reference_number="INV-I001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            created_by=self.user,
+        )
+        invalid = self.make_record("INV-I003")
+        invalid["customer_email"] = "not-an-email"
+        path = self.write_ndjson(
+            [self.make_record("INV-I001"), self.make_record("INV-I002"), invalid]
+        )
+        stdout, stderr = self.run_import(path)
+
+        self.assertIn("Imported 1 invoices, skipped 1 existing, 1 failed", stdout)
+        self.assertIn("record 2:", stderr)
+        self.assertFalse(Invoice.objects.filter(reference_number="INV-I003").exists())
+
+    def test_dry_run_and_offset(self):
+        """Test that --dry-run writes nothing and --offset skips records"""
+        path = self.write_ndjson(
+            [self.make_record(f"INV-I{i:03d}") for i in range(1, 4)]
+        )
+        stdout, _ = self.run_import(path, "--dry-run")
+        self.assertIn("Would import 3 invoices", stdout)
+        self.assertFalse(Invoice.objects.exists())
+
+        self.run_import(path, "--offset", "1")
+        self.assertEqual(
+            sorted(Invoice.objects.values_list("reference_number", flat=True)),
+            ["INV-I002", "INV-I003"],
+        )
+
+    def test_import_reads_csv_export(self):
+        """Test that a CSV export can be imported again"""
+        invoice = Invoice.objects.create(
+            reference_number="INV-I001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            created_by=self.user,
+        )
+        for description in ("Item 1", "Item 2"):
+            InvoiceItem.objects.create(
+                invoice=invoice, description=description, quantity=2, unit_price=5
+            )
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        content = b"".join(
+            client.get("/api/invoices/export/?format=csv").streaming_content
+        ).decode()
+        # Import the export as a different set of invoices
+        path = self.write_file("invoices.csv", content.replace("INV-I001", "INV-C001"))
+        stdout, _ = self.run_import(path)
+
+        self.assertIn("Imported 1 invoices", stdout)
+        imported = Invoice.objects.get(reference_number="INV-C001")
+        self.assertEqual(imported.total_amount, 20)
+        self.assertEqual(
+            list(imported.items.values_list("description", flat=True)),
+            ["Item 1", "Item 2"],
+        )
+
+    def test_workers_only_parse_their_own_records(self):
+        """Test that records of other workers are skipped before parsing"""
+        path = self.write_ndjson([self.make_record(f"INV-W{i:03d}") for i in range(6)])
+        with mock.patch(
+            "invoices.management.commands.import_invoices.json.loads",
+            wraps=json.loads,
+        ) as loads:
+            records = list(
+                read_records(path, "ndjson", owns=lambda index: index % 2 == 1)
+            )
+        self.assertEqual(loads.call_count, 3)
+        self.assertEqual(
+            [(index, record["reference_number"]) for index, record, _ in records],
+            [(1, "INV-W001"), (3, "INV-W003"), (5, "INV-W005")],
+        )
+
+        csv_path = self.write_file(
+            "invoices.csv",
+            "reference_number,customer_name,item_description\n"
+            "INV-C1,A,Item 1\nINV-C1,A,Item 2\nINV-C2,B,\nINV-C3,C,Item 3\n",
+        )
+        records = list(read_records(csv_path, "csv", owns=lambda index: index != 1))
+        self.assertEqual(
+            [
+                (index, record["reference_number"], len(record["items"]))
+                for index, record, _ in records
+            ],
+            [(0, "INV-C1", 2), (2, "INV-C3", 1)],
+        )
+
+    def test_unknown_user_is_rejected(self):
+        """Test that the command requires an existing user"""
+        path = self.write_ndjson([])
+        with self.assertRaises(CommandError):
+            call_command("import_invoices", path, "--user", "nobody")
+
+
+class InvoiceDetailCacheTest(APITestCase):
+    """Test cases for ETags and payload caching on the invoice detail"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference_number="INV-D001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            total_amount=10.00,
+            created_by=self.user,
+        )
+        self.item = InvoiceItem.objects.create(
+            invoice=self.invoice, description="Item 1", quantity=1, unit_price=10.00
+        )
+        self.url = f"/api/invoices/{self.invoice.pk}/"
+
+    def test_conditional_get_returns_not_modified(self):
+        """Test that a matching If-None-Match is answered with 304 in one query"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=f"W/{etag}").status_code,
+            304,
+        )
+
+    def test_cached_payload_is_served_until_invoice_changes(self):
+        """Test that repeated reads use the cache and writes invalidate it"""
+        first = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertEqual(second.json(), first.json())
+
+        response = self.client.patch(
+            self.url,
+            {
+                "customer_name": "Renamed Customer",
+                "items": [
+                    {
+                        "id": self.item.pk,
+                        "description": "Item 1",
+                        "quantity": 2,
+                        "unit_price": "10.00",
+                    }
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        self.assertEqual(response.json()["customer_name"], "Renamed Customer")
+        self.assertEqual(response.json()["total_amount"], "20.00")
+
+    def test_item_changes_outside_the_api_change_the_etag(self):
+        """Test that the ETag follows the item set even if updated_at does not"""
+        etag = self.client.get(self.url)["ETag"]
+        InvoiceItem.objects.filter(pk=self.item.pk).update(total_price=15)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"][0]["total_price"], "15.00")
+
+    def test_other_users_invoices_are_not_found(self):
+        """Test that the ETag check does not leak other users' invoices"""
+        self.client.get(self.url)
+        other_user = User.objects.create_user(
+            username="otheruser", email="other@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=other_user)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class AsyncInvoiceViewsTest(APITestCase):
+    """Test cases for the async invoice endpoints"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoices = []
+        for i in range(3):
+            invoice = Invoice.objects.create(
+                reference_number=f"INV-A00{i}",
+                customer_name="Test Customer",
+                customer_email="customer@example.com",
+                total_amount=10.00,
+                created_by=self.user,
+            )
+            InvoiceItem.objects.create(
+                invoice=invoice, description="Item 1", quantity=1, unit_price=10.00
+            )
+            self.invoices.append(invoice)
+        self.other_user = User.objects.create_user(
+            username="otheruser", email="other@example.com", password="testpass123"
+        )
+        self.other_invoice = Invoice.objects.create(
+            reference_number="INV-B001",
+            customer_name="Other Customer",
+            customer_email="other@example.com",
+            total_amount=10.00,
+            created_by=self.other_user,
+        )
+
+    def test_list_matches_sync_view(self):
+        """Test that the async list pages and serializes like the sync one"""
+        sync_data = self.client.get("/api/invoices/?page_size=2").json()
+        async_data = self.client.get("/api/async/invoices/?page_size=2").json()
+        self.assertEqual(async_data["results"], sync_data["results"])
+        self.assertIsNotNone(async_data["next"])
+
+        response = self.client.get("/api/async/invoices/?status=paid")
+        self.assertEqual(response.json()["results"], [])
+
+    def test_detail_uses_etag(self):
+        """Test that the async detail serves ETags and hides other users' invoices"""
+        url = f"/api/async/invoices/{self.invoices[0].pk}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["items"][0]["description"], "Item 1")
+        self.assertEqual(
+            response["ETag"],
+            self.client.get(f"/api/invoices/{self.invoices[0].pk}/")["ETag"],
+        )
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(f"/api/async/invoices/{self.other_invoice.pk}/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_mark_paid_and_pending(self):
+        """Test that the async status endpoints update the invoice and summary"""
+        invoice = self.invoices[0]
+        response = self.client.patch(f"/api/async/invoices/{invoice.pk}/mark-paid/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "paid")
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.status, "paid")
+        self.assertTrue(
+            Transaction.objects.filter(
+                invoice=invoice, transaction_type="payment"
+            ).exists()
+        )
+        self.assertEqual(
+            InvoiceSummary.objects.get(
+                created_by=self.user, status="paid"
+            ).invoice_count,
+            1,
+        )
+
+        response = self.client.patch(f"/api/async/invoices/{invoice.pk}/mark-pending/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "pending")
+        response = self.client.patch(
+            f"/api/async/invoices/{self.other_invoice.pk}/mark-paid/"
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_requires_authentication(self):
+        """Test that the async endpoints reject anonymous requests"""
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get("/api/async/invoices/").status_code, 401)
+
+
+class MarkInvoiceStatusTest(APITestCase):
+    """Test cases for the conditional, idempotent status endpoints"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference_number="INV-M001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            total_amount=100.00,
+            created_by=self.user,
+        )
+        self.url = f"/api/invoices/{self.invoice.pk}/mark-paid/"
+
+    def payments(self):
+        return Transaction.objects.filter(
+            invoice=self.invoice, transaction_type="payment"
+        ).count()
+
+    def test_repeated_mark_paid_records_one_payment(self):
+        """Test that marking a paid invoice paid again changes nothing"""
+        self.assertEqual(self.client.patch(self.url).status_code, 200)
+        response = self.client.patch(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "paid")
+        self.assertEqual(self.payments(), 1)
+        self.assertEqual(
+            InvoiceSummary.objects.get(
+                created_by=self.user, status="paid"
+            ).invoice_count,
+            1,
+        )
+
+        response = self.client.patch(
+            f"/api/async/invoices/{self.invoice.pk}/mark-paid/"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.payments(), 1)
+
+    def test_cancelled_invoice_cannot_be_paid(self):
+        """Test that only pending invoices can be marked paid"""
+        Invoice.objects.filter(pk=self.invoice.pk).update(status="cancelled")
+        response = self.client.patch(self.url)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.payments(), 0)
+
+        response = self.client.patch(f"/api/invoices/{self.invoice.pk}/mark-pending/")
+        self.assertEqual(response.json()["status"], "pending")
+
+    def test_idempotency_key_replays_response(self):
+        """Test that a retry with the same key is answered without queries"""
+        first = self.client.patch(self.url, HTTP_IDEMPOTENCY_KEY="retry-1")
+        self.client.patch(f"/api/invoices/{self.invoice.pk}/mark-pending/")
+
+        with self.assertNumQueries(0):
+            retry = self.client.patch(self.url, HTTP_IDEMPOTENCY_KEY="retry-1")
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(self.payments(), 1)
+
+        response = self.client.patch(self.url, HTTP_IDEMPOTENCY_KEY="retry-2")
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+        self.assertEqual(self.payments(), 2)
+
+
+class IdempotencyKeyMiddlewareTest(APITestCase):
+    """Test cases for replaying invoice creation with an Idempotency-Key"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.invoice_data = {
+            "reference_number": "INV-K001",
+            "customer_name": "Test Customer",
+            "customer_email": "customer@example.com",
+            "items": [{"description": "Item 1", "quantity": 1, "unit_price": "10.00"}],
+        }
+
+    def create(self, data, key):
+        return self.client.post(
+            "/api/invoices/", data, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=0)
+    def test_retry_replays_response_without_creating(self):
+        """Test that a retry with the same key returns the stored response"""
+        first = self.create(self.invoice_data, "key-1")
+        self.assertEqual(first.status_code, 201)
+
+        # Only the token's user is read; the replay itself runs no query
+        with self.assertNumQueries(1):
+            retry = self.create(self.invoice_data, "key-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Invoice.objects.count(), 1)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_key_reused_for_different_request_is_rejected(self):
+        """Test that a key cannot be reused with a different body"""
+        self.create(self.invoice_data, "key-1")
+        response = self.create(
+            {**self.invoice_data, "reference_number": "INV-K002"}, "key-1"
+        )
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Invoice.objects.count(), 1)
+
+    def test_failed_requests_are_not_stored(self):
+        """Test that a rejected request can be retried with the same key"""
+        response = self.create({**self.invoice_data, "customer_email": "x"}, "key-1")
+        self.assertEqual(response.status_code, 400)
+        response = self.create(self.invoice_data, "key-1")
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(response.has_header("Idempotent-Replayed"))
+
+    def test_keys_are_scoped_per_user(self):
+        """Test that another user's key does not replay this user's response"""
+        self.create(self.invoice_data, "key-1")
+        other_user = User.objects.create_user(
+            username="otheruser", email="other@example.com", password="testpass123"
+        )
+        token = RefreshToken.for_user(other_user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.create(
+            {**self.invoice_data, "reference_number": "INV-K002"}, "key-1"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Invoice.objects.count(), 2)
+
+
+class InvoiceBulkStatusTest(APITestCase):
+    """Test cases for the bulk status transition endpoint"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoices = [
+            Invoice.objects.create(
+                reference_number=f"INV-T{i:03d}",
+                customer_name="Test Customer",
+                customer_email="customer@example.com",
+                total_amount=10.00,
+                created_by=self.user,
+            )
+            for i in range(4)
+        ]
+        InvoiceSummary.rebuild()
+
+    def test_bulk_mark_paid_reports_outcome_per_id(self):
+        """Test that pending invoices are paid and the others are reported"""
+        paid, cancelled = self.invoices[2], self.invoices[3]
+        Invoice.objects.filter(pk=paid.pk).update(status="paid")
+        Invoice.objects.filter(pk=cancelled.pk).update(status="cancelled")
+        InvoiceSummary.rebuild()
+        other_user = User.objects.create_user(
+            username="otheruser", email="other@example.com", password="testpass123"
+        )
+        other_invoice = Invoice.objects.create(
+            reference_number="INV-O001",
+            customer_name="Other Customer",
+            customer_email="other@example.com",
+            created_by=other_user,
+        )
+
+        ids = [invoice.pk for invoice in self.invoices] + [other_invoice.pk]
+        response = self.client.post(
+            "/api/invoices/bulk-status/", {"ids": ids, "status": "paid"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["updated"], 2)
+        self.assertEqual(
+            [result["outcome"] for result in data["results"]],
+            ["updated", "updated", "unchanged", "conflict", "not_found"],
+        )
+        self.assertEqual(data["results"][3]["status"], "cancelled")
+        self.assertEqual(
+            Transaction.objects.filter(transaction_type="payment").count(), 2
+        )
+        summary = InvoiceSummary.objects.get(created_by=self.user, status="paid")
+        self.assertEqual(summary.invoice_count, 3)
+        self.assertEqual(summary.total_amount, 30)
+        other_invoice.refresh_from_db()
+        self.assertEqual(other_invoice.status, "pending")
+
+    def test_query_count_does_not_grow_with_ids(self):
+        """Test that the transition is set-based"""
+        InvoiceSummary.objects.create(created_by=self.user, status="paid")
+        ids = [invoice.pk for invoice in self.invoices]
+        with self.assertNumQueries(7):
+            self.client.post(
+                "/api/invoices/bulk-status/",
+                {"ids": ids[:1], "status": "paid"},
+                format="json",
+            )
+        with self.assertNumQueries(7):
+            self.client.post(
+                "/api/invoices/bulk-status/",
+                {"ids": ids[1:], "status": "paid"},
+                format="json",
+            )
+        self.assertEqual(Invoice.objects.filter(status="paid").count(), 4)
+
+    def test_invalid_requests_are_rejected(self):
+        """Test that the ids and status are validated"""
+        for payload in [
+            {"ids": [], "status": "paid"},
+            {"ids": [self.invoices[0].pk], "status": "cancelled"},
+            {"status": "paid"},
+        ]:
+            response = self.client.post(
+                "/api/invoices/bulk-status/", payload, format="json"
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class BenchmarkCommandTest(TestCase):
+    """Test cases for the benchmark data generator and runner"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        call_command(
+            "generate_benchmark_data",
+            "--users",
+            "1",
+            "--invoices",
+            "20",
+            "--max-items",
+            "30",
+            stdout=StringIO(),
+        )
+        self.user = User.objects.get(username="bench-user-0")
+
+    def test_generated_data_is_consistent(self):
+        """Test that invoices, items, transactions and summaries agree"""
+        invoices = Invoice.objects.filter(created_by=self.user)
+        self.assertEqual(invoices.count(), 20)
+        for invoice in invoices.prefetch_related("items"):
+            self.assertTrue(1 <= len(invoice.items.all()) <= 30)
+            self.assertEqual(
+                invoice.total_amount,
+                sum(item.total_price for item in invoice.items.all()),
+            )
+        paid = invoices.filter(status="paid").count()
+        self.assertEqual(
+            Transaction.objects.filter(transaction_type="payment").count(), paid
+        )
+        self.assertEqual(
+            InvoiceSummary.objects.get(
+                created_by=self.user, status="paid"
+            ).invoice_count,
+            paid,
+        )
+
+    def test_benchmark_reports_json_and_compares_with_baseline(self):
+        """Test a test-client run, its report and the baseline comparison"""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            call_command(
+                "benchmark_api",
+                "--username",
+                "bench-user-0",
+                "--requests",
+                "5",
+                "--output",
+                output,
+                stdout=StringIO(),
+            )
+            with open(output) as f:
+                results = json.load(f)
+
+            self.assertEqual(results["target"], "test-client")
+            self.assertEqual(
+                list(results["scenarios"]),
+                ["list", "detail", "create", "update", "mark-paid"],
+            )
+            for scenario in results["scenarios"].values():
+                self.assertEqual(scenario["errors"], 0)
+                self.assertGreater(scenario["rps"], 0)
+                self.assertGreater(scenario["queries_per_request"]["mean"], 0)
+                self.assertLessEqual(
+                    scenario["latency_ms"]["p50"], scenario["latency_ms"]["p99"]
+                )
+
+            results["scenarios"]["list"]["queries_per_request"]["max"] -= 1
+            baseline = os.path.join(directory, "baseline.json")
+            with open(baseline, "w") as f:
+                json.dump(results, f)
+            with self.assertRaisesMessage(CommandError, "list: queries per request"):
+                call_command(
+                    "benchmark_api",
+                    "--username",
+                    "bench-user-0",
+                    "--scenarios",
+                    "list",
+                    "--requests",
+                    "5",
+                    "--baseline",
+                    baseline,
+                    "--max-regression",
+                    "100",
+                    stdout=StringIO(),
+                    stderr=StringIO(),
+                )
+
+    def test_missing_query_count_header_is_reported(self):
+        """Test that a server without debug headers gets a warning, not silence"""
+        stderr = StringIO()
+        with mock.patch(
+            "invoices.benchmarking.HTTPTransport.send", return_value=(200, None)
+        ):
+            call_command(
+                "benchmark_api",
+                "--username",
+                "bench-user-0",
+                "--url",
+                "http://127.0.0.1:8000",
+                "--scenarios",
+                "list,detail",
+                "--requests",
+                "2",
+                stdout=StringIO(),
+                stderr=stderr,
+            )
+        self.assertIn("No X-DB-Query-Count header", stderr.getvalue())
+        self.assertIn("list, detail", stderr.getvalue())
+        self.assertIn("METRICS_DEBUG_HEADERS=true", stderr.getvalue())
+
+
+class InvoiceQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """Test cases for the query budget of every invoice endpoint"""
+
+    urlconf = "invoices.urls"
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.pending, self.paid = [], []
+
+    def populate(self, size):
+        """Add pending and paid invoices with ``size`` items each, up to ``size``"""
+        for status, invoices in (("pending", self.pending), ("paid", self.paid)):
+            while len(invoices) < size:
+                invoice = Invoice.objects.create(
+                    reference_number=f"INV-{status[:2].upper()}{len(invoices):03d}",
+                    customer_name="Test Customer",
+                    customer_email="customer@example.com",
+                    total_amount=10.00 * size,
+                    status=status,
+                    created_by=self.user,
+                )
+                InvoiceItem.objects.bulk_create(
+                    InvoiceItem(
+                        invoice=invoice,
+                        description=f"Item {j}",
+                        quantity=1,
+                        unit_price=10.00,
+                        total_price=10.00,
+                    )
+                    for j in range(size)
+                )
+                Transaction.objects.create(
+                    invoice=invoice,
+                    transaction_type="sale",
+                    amount=invoice.total_amount,
+                    created_by=self.user,
+                )
+                invoices.append(invoice)
+        InvoiceSummary.rebuild()
+
+    def invoice_payload(self, reference_number, size):
+        return {
+            "reference_number": reference_number,
+            "customer_name": "Test Customer",
+            "customer_email": "customer@example.com",
+            "items": [
+                {"description": f"Item {j}", "quantity": 2, "unit_price": "5.00"}
+                for j in range(size)
+            ],
+        }
+
+    @query_budget("invoice-list-create", queries=2, db_time=0.5)
+    def test_list(self, size):
+        """Test the query budget of listing invoices"""
+        return self.client.get("/api/invoices/")
+
+    @query_budget("invoice-list-create", queries=1, db_time=0.5)
+    def test_list_summary(self, size):
+        """Test the query budget of listing invoices with item counts"""
+        return self.client.get("/api/invoices/", {"view": "summary"})
+
+    @query_budget("invoice-list-create", queries=8, db_time=0.5)
+    def test_create(self, size):
+        """Test the query budget of creating an invoice"""
+        return self.client.post(
+            "/api/invoices/",
+            self.invoice_payload(f"INV-N{size:03d}", size),
+            format="json",
+        )
+
+    @query_budget("invoice-export", queries=2, db_time=0.5)
+    def test_export(self, size):
+        """Test the query budget of exporting invoices"""
+        return self.client.get("/api/invoices/export/")
+
+    @query_budget("invoice-summary", queries=1, db_time=0.5)
+    def test_summary(self, size):
+        """Test the query budget of the invoice summary"""
+        return self.client.get("/api/invoices/summary/")
+
+    @query_budget("invoice-search", queries=2, db_time=0.5)
+    def test_search(self, size):
+        """Test the query budget of searching invoices"""
+        return self.client.get("/api/invoices/search/", {"q": "Customer"})
+
+    @query_budget("invoice-bulk-create", queries=7, db_time=0.5)
+    def test_bulk_create(self, size):
+        """Test the query budget of creating invoices in bulk"""
+        payload = [
+            self.invoice_payload(f"INV-B{size:03d}-{i}", size) for i in range(size)
+        ]
+        return self.client.post("/api/invoices/bulk/", payload, format="json")
+
+    @query_budget("invoice-bulk-status", queries=7, db_time=0.5)
+    def test_bulk_status(self, size):
+        """Test the query budget of a bulk status transition"""
+        ids = [invoice.pk for invoice in self.pending]
+        return self.client.post(
+            "/api/invoices/bulk-status/", {"ids": ids, "status": "paid"}, format="json"
+        )
+
+    @query_budget("invoice-detail", queries=3, db_time=0.5)
+    def test_retrieve(self, size):
+        """Test the query budget of retrieving an invoice"""
+        return self.client.get(f"/api/invoices/{self.pending[-1].pk}/")
+
+    @query_budget("invoice-detail", queries=10, db_time=0.5)
+    def test_update(self, size):
+        """Test the query budget of updating an invoice"""
+        invoice = self.pending[-1]
+        payload = self.invoice_payload(invoice.reference_number, size)
+        payload["items"] = [
+            {"id": item.pk, "description": "Updated", "quantity": 3, "unit_price": "5"}
+            for item in invoice.items.all()
+        ]
+        return self.client.put(f"/api/invoices/{invoice.pk}/", payload, format="json")
+
+    @query_budget("invoice-detail", queries=7, db_time=0.5)
+    def test_delete(self, size):
+        """Test the query budget of deleting an invoice"""
+        return self.client.delete(f"/api/invoices/{self.pending[-1].pk}/")
+
+    @query_budget("invoice-mark-paid", queries=8, db_time=0.5)
+    def test_mark_paid(self, size):
+        """Test the query budget of marking an invoice paid"""
+        return self.client.patch(f"/api/invoices/{self.pending[-1].pk}/mark-paid/")
+
+    @query_budget("invoice-mark-pending", queries=7, db_time=0.5)
+    def test_mark_pending(self, size):
+        """Test the query budget of marking an invoice pending"""
+        return self.client.patch(f"/api/invoices/{self.paid[-1].pk}/mark-pending/")
+
+
+class InvoiceRowSerializerTest(APITestCase):
+    """Test cases for listing invoices from plain rows"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        for i in range(3):
+            invoice = Invoice.objects.create(
+                reference_number=f"INV-R{i:03d}",
+                customer_name="Test Customer",
+                customer_email="customer@example.com",
+                created_by=self.user,
+            )
+            for j in range(i):
+                InvoiceItem.objects.create(
+                    invoice=invoice,
+                    description=f"Item {j}",
+                    quantity=j + 1,
+                    unit_price=12.50,
+                )
+            invoice.calculate_total()
+
+    def test_rows_serialize_like_the_model_serializer(self):
+        """Test that the row serializer output equals InvoiceSerializer's"""
+        invoices = Invoice.objects.filter(created_by=self.user).order_by("id")
+        expected = InvoiceSerializer(invoices.prefetch_related("items"), many=True).data
+        self.assertEqual(
+            InvoiceRowSerializer(invoices.values(*INVOICE_COLUMNS), many=True).data,
+            expected,
+        )
+
+        response = self.client.get("/api/invoices/", {"ordering": "reference_number"})
+        self.assertEqual(response.json()["results"], json.loads(json.dumps(expected)))
+
+    def test_sparse_fields_skip_items(self):
+        """Test that ?fields= without items returns only those fields in one query"""
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/api/invoices/", {"fields": "total_amount,reference_number"}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"][0],
+            {"reference_number": "INV-R002", "total_amount": "37.50"},
+        )
+
+        response = self.client.get(
+            "/api/invoices/search/", {"q": "Customer", "fields": "id,items"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            sorted(len(invoice["items"]) for invoice in response.json()["results"]),
+            [0, 1, 2],
+        )
+
+    def test_summary_view_counts_items_in_one_query(self):
+        """Test that ?view=summary returns item counts without loading items"""
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/invoices/", {"view": "summary"})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(
+            [
+                (invoice["reference_number"], invoice["item_count"])
+                for invoice in results
+            ],
+            [("INV-R002", 2), ("INV-R001", 1), ("INV-R000", 0)],
+        )
+        self.assertEqual(results[0]["total_amount"], "37.50")
+        self.assertNotIn("items", results[0])
+
+        response = self.client.get(
+            "/api/invoices/",
+            {"view": "summary", "fields": "item_count", "ordering": "total_amount"},
+        )
+        self.assertEqual(
+            response.json()["results"],
+            [{"item_count": 0}, {"item_count": 1}, {"item_count": 2}],
+        )
+
+        response = self.client.get(
+            "/api/invoices/", {"view": "summary", "fields": "items"}
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/invoices/", {"view": "compact"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_fields_are_rejected(self):
+        """Test that asking for a field invoices do not have is a bad request"""
+        response = self.client.get("/api/invoices/", {"fields": "id,created_by"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"fields": "Unknown fields: created_by"})
+
+    def test_benchmark_command(self):
+        """Test that the serializer benchmark reports each case"""
+        output = StringIO()
+        call_command(
+            "benchmark_serializers",
+            "--username",
+            "testuser",
+            "--repeat",
+            "1",
+            stdout=output,
+        )
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(all("x faster" in line for line in lines))
+
+
+class ConnectionBenchmarkCommandTest(TestCase):
+    """Test cases for the database connection benchmark"""
+
+    def test_reports_each_configuration(self):
+        """Test that fresh and persistent connections are both measured"""
+        output = StringIO()
+        call_command("benchmark_connections", "--requests", "5", stdout=output)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith("new connection per request: mean="))
+        self.assertIn("saved per request", lines[1])
+
+    @skipUnless(connection.vendor != "postgresql", "Pools are supported")
+    def test_pool_needs_postgresql(self):
+        """Test that --pool is refused on databases without pool support"""
+        with self.assertRaisesMessage(CommandError, "--pool needs a PostgreSQL"):
+            call_command("benchmark_connections", "--pool", stdout=StringIO())
@@ -0,0 +1,122 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.utils import timezone
+from .models import InvoiceSummary
+from transactions.models import Transaction
+
+# The statuses an invoice can be moved to each status from
+STATUS_SOURCES = {"paid": ("pending",), "pending": ("paid", "cancelled")}
+
+# The transaction recorded for the invoice's total when it reaches a status
+STATUS_TRANSACTIONS = {"paid": "payment"}
+
+
+def creation_transactions(invoices):
+    """Return the unsaved transactions recorded for newly created ``invoices``.
+
+    Each invoice gets a sale of its total. One created in a status that
+    records a transaction when reached, such as paid, also gets that
+    transaction, so its ledger is the same as if it had been moved there.
+    """
+    transactions = []
+    for invoice in invoices:
+        transaction_types = ["sale"]
+        if invoice.status in STATUS_TRANSACTIONS:
+            transaction_types.append(STATUS_TRANSACTIONS[invoice.status])
+        transactions.extend(
+            Transaction(
+                invoice=invoice,
+                transaction_type=transaction_type,
+                amount=invoice.total_amount,
+                created_by_id=invoice.created_by_id,
+            )
+            for transaction_type in transaction_types
+        )
+    return transactions
+
+
+def transition_invoice(queryset, pk, new_status):
+    """Move invoice ``pk`` of ``queryset`` to ``new_status`` if it is allowed to.
+
+    Each allowed source status is tried with a conditional UPDATE, so when
+    requests race only one of them changes the invoice and records its
+    transaction. Returns the invoice, with its items, and the status it was
+    moved from, or None if it was not moved. Raises ``Invoice.DoesNotExist``
+    if the invoice is not in ``queryset``.
+    """
+    with transaction.atomic():
+        old_status = None
+        for source in STATUS_SOURCES[new_status]:
+            if queryset.filter(pk=pk, status=source).update(
+                status=new_status, updated_at=timezone.now()
+            ):
+                old_status = source
+                break
+        invoice = queryset.prefetch_related("items").get(pk=pk)
+        if old_status is None:
+            return invoice, None
+
+        InvoiceSummary.record_change(
+            invoice.created_by_id,
+            old_status,
+            invoice.total_amount,
+            new_status,
+            invoice.total_amount,
+        )
+        if new_status in STATUS_TRANSACTIONS:
+            Transaction.objects.create(
+                invoice=invoice,
+                transaction_type=STATUS_TRANSACTIONS[new_status],
+                amount=invoice.total_amount,
+                created_by_id=invoice.created_by_id,
+            )
+    return invoice, old_status
+
+
+def transition_invoices(queryset, pks, new_status, batch_size=500):
+    """Move the invoices ``pks`` of ``queryset`` that are allowed to ``new_status``.
+
+    The invoices are locked and read with one query, those in an allowed
+    source status are moved with one UPDATE, and their transactions are
+    inserted with ``bulk_create``. Returns ``{pk: status}`` with the status
+    of each invoice found before the change, and the list of moved pks.
+    """
+    sources = STATUS_SOURCES[new_status]
+    with transaction.atomic():
+        rows = list(
+            queryset.filter(pk__in=pks)
+            .select_for_update()
+            .order_by("pk")
+            .values("pk", "status", "total_amount", "created_by_id")
+        )
+        moving = [row for row in rows if row["status"] in sources]
+        if moving:
+            queryset.filter(
+                pk__in=[row["pk"] for row in moving], status__in=sources
+            ).update(status=new_status, updated_at=timezone.now())
+
+            deltas = defaultdict(lambda: defaultdict(lambda: [0, Decimal("0")]))
+            for row in moving:
+                user_deltas = deltas[row["created_by_id"]]
+                user_deltas[row["status"]][0] -= 1
+                user_deltas[row["status"]][1] -= row["total_amount"]
+                user_deltas[new_status][0] += 1
+                user_deltas[new_status][1] += row["total_amount"]
+            for created_by_id, user_deltas in deltas.items():
+                InvoiceSummary.adjust(created_by_id, user_deltas)
+
+            if new_status in STATUS_TRANSACTIONS:
+                Transaction.objects.bulk_create(
+                    [
+                        Transaction(
+                            invoice_id=row["pk"],
+                            transaction_type=STATUS_TRANSACTIONS[new_status],
+                            amount=row["total_amount"],
+                            created_by_id=row["created_by_id"],
+                        )
+                        for row in moving
+                    ],
+                    batch_size=batch_size,
+                )
+    return {row["pk"]: row["status"] for row in rows}, [row["pk"] for row in moving]
@@ -3,6 +3,15 @@ from . import views
 
 urlpatterns = [
     path("", views.InvoiceListCreateView.as_view(), name="invoice-list-create"),
+    path("export/", views.InvoiceExportView.as_view(), name="invoice-export"),
+    path("summary/", views.InvoiceSummaryView.as_view(), name="invoice-summary"),
+    path("search/", views.InvoiceSearchView.as_view(), name="invoice-search"),
+    path("bulk/", views.InvoiceBulkCreateView.as_view(), name="invoice-bulk-create"),
+    path(
+        "bulk-status/",
+        views.InvoiceBulkStatusView.as_view(),
+        name="invoice-bulk-status",
+    ),
     path("<int:pk>/", views.InvoiceDetailView.as_view(), name="invoice-detail"),
     path("<int:pk>/mark-paid/", views.mark_invoice_paid, name="invoice-mark-paid"),
     path(
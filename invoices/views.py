@@ -1,36 +1,293 @@
-from django.shortcuts import render, get_object_or_404
+from django.http import Http404
+from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from rest_framework import status, generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.decorators import api_view, permission_classes
-from decimal import Decimal
-from .models import Invoice, InvoiceItem
-from .serializers import InvoiceSerializer
+from django.db import IntegrityError, transaction
+from .models import Invoice, InvoiceSummary
+from .caching import (
+    cache_detail,
+    etag_matches,
+    get_cached_detail,
+    invalidate_invoice_cache,
+    invoice_etag,
+)
+from .exports import (
+    EXPORT_CHUNK_SIZE,
+    INVOICE_CSV_HEADER,
+    CSVRenderer,
+    NDJSONRenderer,
+    invoice_csv_rows,
+    stream_export,
+)
+from .filters import InvoiceFilterBackend
+from .idempotency import get_stored_response, idempotency_key, store_response
+from .pagination import InvoiceCursorPagination, InvoiceSearchPagination
+from .records import (
+    INVOICE_COLUMNS,
+    INVOICE_FIELDS,
+    INVOICE_SUMMARY_FIELDS,
+    chunked,
+    invoice_records,
+    parse_fields,
+    with_item_count,
+)
+from .search import search_invoices
+from .serializers import (
+    InvoiceBatchSerializer,
+    InvoiceBulkListSerializer,
+    InvoiceBulkStatusSerializer,
+    InvoiceRowSerializer,
+    InvoiceSerializer,
+)
+from .transitions import (
+    creation_transactions,
+    transition_invoice,
+    transition_invoices,
+)
 from transactions.models import Transaction
+from transactions.reports import invalidate_report_cache
 
 
-class InvoiceListCreateView(generics.ListCreateAPIView):
-    serializer_class = InvoiceSerializer
+class InvoiceRowsMixin:
+    """List invoices from ``.values()`` rows with ``InvoiceRowSerializer``.
+
+    ``?fields=`` limits the output to some of the invoice fields; unless
+    ``items`` is among them, items are not loaded. ``?view=summary``
+    replaces the items with an ``item_count``. Other methods use
+    ``InvoiceSerializer``.
+    """
+
+    views = ["full", "summary"]
+
+    def summary_view(self):
+        view = self.request.query_params.get("view", "full")
+        if view not in self.views:
+            raise ValidationError({"view": f"Expected one of: {', '.join(self.views)}"})
+        return view == "summary"
+
+    def select_rows(self, invoices):
+        """Select the rows of the requested view from ``invoices``"""
+        if self.summary_view():
+            return with_item_count(invoices).values(*INVOICE_SUMMARY_FIELDS)
+        return invoices.values(*INVOICE_COLUMNS)
+
+    def reads_rows(self):
+        # Schema generation describes the rows with the model serializer
+        return self.request.method == "GET" and not getattr(
+            self, "swagger_fake_view", False
+        )
+
+    def get_serializer_class(self):
+        if self.reads_rows():
+            return InvoiceRowSerializer
+        return InvoiceSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        if self.reads_rows():
+            allowed = INVOICE_SUMMARY_FIELDS if self.summary_view() else INVOICE_FIELDS
+            kwargs["fields"] = parse_fields(self.request.query_params, allowed)
+        return super().get_serializer(*args, **kwargs)
+
+
+class InvoiceListCreateView(InvoiceRowsMixin, generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = InvoiceCursorPagination
+    filter_backends = [InvoiceFilterBackend, OrderingFilter]
+    ordering_fields = ["created_at", "total_amount", "reference_number"]
+    ordering = ["-created_at", "id"]
 
     def get_queryset(self):
-        # Return only invoices created by the current user
-        return Invoice.objects.filter(created_by=self.request.user)
+        # Return only invoices created by the current user, as plain rows;
+        # the serializer fetches the items of a page in a single extra query
+        return self.select_rows(Invoice.objects.filter(created_by=self.request.user))
 
     def perform_create(self, serializer):
         # Save the invoice using the serializer (this handles item creation)
         invoice = serializer.save(created_by=self.request.user)
 
-        # Create sale transaction with the calculated total
-        # The total is already calculated by the serializer's create method
-        Transaction.objects.create(
-            invoice=invoice,
-            transaction_type="sale",
-            amount=invoice.total_amount,
-            created_by=self.request.user,
+        # Record the sale, and the payment of an invoice created as paid,
+        # with the total calculated by the serializer's create method
+        Transaction.objects.bulk_create(creation_transactions([invoice]))
+
+
+class InvoiceExportView(APIView):
+    """Stream the current user's invoices and items as CSV or NDJSON.
+
+    Choose the format with ``?format=csv`` (default) or ``?format=ndjson``,
+    or the Accept header. The list filters apply.
+    """
+
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+
+    def get(self, request):
+        invoices = InvoiceFilterBackend().filter_queryset(
+            request, Invoice.objects.filter(created_by=request.user), self
+        )
+        # Iterate with a server-side cursor, loading items per chunk, so
+        # memory use does not depend on the number of invoices
+        rows = (
+            invoices.order_by("id")
+            .values(*INVOICE_COLUMNS)
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+
+        def records():
+            for chunk in chunked(rows, EXPORT_CHUNK_SIZE):
+                yield from invoice_records(chunk)
+
+        def csv_rows():
+            for record in records():
+                yield from invoice_csv_rows(record)
+
+        return stream_export(
+            request.accepted_renderer,
+            "invoices",
+            INVOICE_CSV_HEADER,
+            csv_rows,
+            records,
+        )
+
+
+class InvoiceSearchView(InvoiceRowsMixin, generics.ListAPIView):
+    """Ranked search over invoice customers, references and item descriptions"""
+
+    permission_classes = [IsAuthenticated]
+    pagination_class = InvoiceSearchPagination
+    # Trigram indexes cannot narrow down queries shorter than three characters
+    min_query_length = 3
+
+    def get_queryset(self):
+        query = self.request.query_params.get("q", "").strip()
+        if len(query) < self.min_query_length:
+            raise ValidationError(
+                {"q": f"Enter at least {self.min_query_length} characters"}
+            )
+        invoices = Invoice.objects.filter(created_by=self.request.user)
+        return self.select_rows(search_invoices(invoices, query))
+
+
+class InvoiceBulkCreateView(APIView):
+    """Create many invoices, their items and sale transactions in one request"""
+
+    permission_classes = [IsAuthenticated]
+    max_batch_size = 1000
+
+    def post(self, request):
+        invoices_data = request.data
+        if isinstance(invoices_data, dict):
+            invoices_data = invoices_data.get("invoices")
+        if not isinstance(invoices_data, list) or not invoices_data:
+            return Response(
+                {"error": "Expected a non-empty list of invoices"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(invoices_data) > self.max_batch_size:
+            return Response(
+                {"error": f"At most {self.max_batch_size} invoices per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Validate every invoice on its own so one bad row does not reject
+        # the whole batch
+        valid, errors = [], []
+        for index, invoice_data in enumerate(invoices_data):
+            serializer = InvoiceBatchSerializer(data=invoice_data)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({"index": index, "errors": serializer.errors})
+
+        # Check reference uniqueness against the database and within the batch
+        accepted, duplicates = InvoiceBulkListSerializer.split_new_references(valid)
+        for index, _ in duplicates:
+            errors.append(
+                {
+                    "index": index,
+                    "errors": {
+                        "reference_number": [
+                            "invoice with this reference number already exists."
+                        ]
+                    },
+                }
+            )
+        accepted = [
+            (index, {**data, "created_by": request.user}) for index, data in accepted
+        ]
+
+        created = []
+        if accepted:
+            try:
+                invoices = InvoiceBatchSerializer(many=True).create(
+                    [data for _, data in accepted]
+                )
+            except IntegrityError:
+                # A concurrent request claimed one of the reference numbers
+                # between the check above and the insert
+                return Response(
+                    {"error": "Reference number conflict, please retry the batch"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            created = [
+                {
+                    "index": index,
+                    "id": invoice.pk,
+                    "reference_number": invoice.reference_number,
+                    "total_amount": str(invoice.total_amount),
+                }
+                for (index, _), invoice in zip(accepted, invoices)
+            ]
+
+        errors.sort(key=lambda error: error["index"])
+        if not created:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({"created": created, "errors": errors}, status=response_status)
+
+
+class InvoiceBulkStatusView(APIView):
+    """Move many of the user's invoices to a status in one request.
+
+    Each id is reported as ``updated``, ``unchanged`` (already in the
+    status), ``conflict`` (in a status it cannot move from) or
+    ``not_found``.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = InvoiceBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data["status"]
+        pks = list(dict.fromkeys(serializer.validated_data["ids"]))
+
+        found, moved = transition_invoices(
+            Invoice.objects.filter(created_by=request.user), pks, new_status
         )
+        invalidate_invoice_cache(*moved)
+
+        moved = set(moved)
+        results = []
+        for pk in pks:
+            if pk in moved:
+                result = {"id": pk, "outcome": "updated"}
+            elif pk not in found:
+                result = {"id": pk, "outcome": "not_found"}
+            elif found[pk] == new_status:
+                result = {"id": pk, "outcome": "unchanged"}
+            else:
+                result = {"id": pk, "outcome": "conflict", "status": found[pk]}
+            results.append(result)
+        return Response({"updated": len(moved), "results": results})
 
 
 class InvoiceDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -41,65 +298,90 @@ class InvoiceDetailView(generics.RetrieveUpdateDestroyAPIView):
         # Return only invoices created by the current user
         return Invoice.objects.filter(created_by=self.request.user)
 
-    def perform_update(self, serializer):
-        """Allow updating invoices at any time, regardless of status"""
-        invoice = serializer.save()
-        # Recalculate total if items data is provided
-        items_data = self.request.data.get("items", [])
-        if items_data:
-            # Clear existing items
-            invoice.items.all().delete()
-            # Create new items
-            for item_data in items_data:
-                item_data["quantity"] = int(item_data.get("quantity", 0))
-                item_data["unit_price"] = Decimal(str(item_data.get("unit_price", 0)))
-                InvoiceItem.objects.create(invoice=invoice, **item_data)
+    def retrieve(self, request, *args, **kwargs):
+        # Validate against the ETag first, so unchanged invoices are answered
+        # with 304 or a cached payload without loading and serializing them
+        pk = kwargs["pk"]
+        etag = invoice_etag(self.get_queryset(), pk)
+        if etag is None:
+            raise Http404
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-            # Recalculate total amount
-            invoice.calculate_total()
+        data = get_cached_detail(pk, etag)
+        if data is None:
+            data = self.get_serializer(self.get_object()).data
+            cache_detail(pk, etag, data)
+        return Response(data, headers={"ETag": etag})
 
+    def perform_destroy(self, instance):
+        pk = instance.pk
+        with transaction.atomic():
+            InvoiceSummary.record_invoices([instance], sign=-1)
+            instance.delete()
+        invalidate_invoice_cache(pk)
+        # The invoice's transactions were deleted with it
+        invalidate_report_cache()
 
-@api_view(["PATCH"])
-@permission_classes([IsAuthenticated])
-def mark_invoice_paid(request, pk):
-    try:
-        invoice = get_object_or_404(Invoice, pk=pk, created_by=request.user)
-
-        # Update invoice status
-        invoice.status = "paid"
-        invoice.save()
-
-        # Create payment transaction
-        Transaction.objects.create(
-            invoice=invoice,
-            transaction_type="payment",
-            amount=invoice.total_amount,
-            created_by=request.user,
-        )
 
-        serializer = InvoiceSerializer(invoice)
-        return Response(serializer.data)
-    except (ValueError, TypeError) as e:
+class InvoiceSummaryView(APIView):
+    """Invoice count and amount per status for the current user"""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        summary = {
+            choice: {"count": 0, "total_amount": "0.00"}
+            for choice, _ in Invoice.STATUS_CHOICES
+        }
+        for row in InvoiceSummary.objects.filter(created_by=request.user):
+            summary[row.status] = {
+                "count": row.invoice_count,
+                "total_amount": str(row.total_amount),
+            }
+        return Response(summary)
+
+
+def set_invoice_status(request, pk, new_status):
+    """Move one of the user's invoices to ``new_status`` and serialize it.
+
+    Invoices already in ``new_status`` are returned unchanged. A retry sent
+    with the same ``Idempotency-Key`` header gets the first response back
+    without touching the database.
+    """
+    key = idempotency_key(request)
+    scope = f"invoice-status:{pk}:{new_status}"
+    if key is not None:
+        stored = get_stored_response(request.user.pk, scope, key)
+        if stored is not None:
+            return Response(stored, headers={"Idempotent-Replayed": "true"})
+
+    queryset = Invoice.objects.filter(created_by=request.user)
+    try:
+        invoice, old_status = transition_invoice(queryset, pk, new_status)
+    except Invoice.DoesNotExist:
+        raise Http404
+    if old_status is not None:
+        invalidate_invoice_cache(invoice.pk)
+    elif invoice.status != new_status:
         return Response(
-            {"error": "Invalid data type in request"},
-            status=status.HTTP_400_BAD_REQUEST,
+            {"error": f"A {invoice.status} invoice cannot be marked {new_status}"},
+            status=status.HTTP_409_CONFLICT,
         )
 
+    data = InvoiceSerializer(invoice).data
+    if key is not None:
+        store_response(request.user.pk, scope, key, data)
+    return Response(data)
+
 
 @api_view(["PATCH"])
 @permission_classes([IsAuthenticated])
-def mark_invoice_pending(request, pk):
-    try:
-        invoice = get_object_or_404(Invoice, pk=pk, created_by=request.user)
+def mark_invoice_paid(request, pk):
+    return set_invoice_status(request, pk, "paid")
 
-        # Update invoice status to pending
-        invoice.status = "pending"
-        invoice.save()
 
-        serializer = InvoiceSerializer(invoice)
-        return Response(serializer.data)
-    except (ValueError, TypeError) as e:
-        return Response(
-            {"error": "Invalid data type in request"},
-            status=status.HTTP_400_BAD_REQUEST,
-        )
+@api_view(["PATCH"])
+@permission_classes([IsAuthenticated])
+def mark_invoice_pending(request, pk):
+    return set_invoice_status(request, pk, "pending")
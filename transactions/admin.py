@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Transaction
+from .reports import invalidate_report_cache
 
 
 @admin.register(Transaction)
@@ -14,3 +15,15 @@ class TransactionAdmin(admin.ModelAdmin):
     list_filter = ("transaction_type", "status", "transaction_date")
     search_fields = ("invoice__reference_number",)
     readonly_fields = ("transaction_date",)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_report_cache()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        invalidate_report_cache()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        invalidate_report_cache()
@@ -0,0 +1,15 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path(
+        "",
+        async_views.AsyncTransactionListView.as_view(),
+        name="async-transaction-list",
+    ),
+    path(
+        "<int:pk>/",
+        async_views.AsyncTransactionDetailView.as_view(),
+        name="async-transaction-detail",
+    ),
+]
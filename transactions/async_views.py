@@ -0,0 +1,19 @@
+"""Async versions of the transaction list and detail endpoints.
+
+They are mounted under ``/api/async/transactions/``; see
+``invoices.async_views``.
+"""
+
+from adrf import generics
+from rest_framework.permissions import IsAuthenticated
+from .pagination import TransactionCursorPagination
+from .views import TransactionQuerysetMixin
+
+
+class AsyncTransactionListView(TransactionQuerysetMixin, generics.ListAPIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = TransactionCursorPagination
+
+
+class AsyncTransactionDetailView(TransactionQuerysetMixin, generics.RetrieveAPIView):
+    permission_classes = [IsAuthenticated]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0002_invoice_invoice_owner_created_idx"),
+        ("transactions", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["-transaction_date", "id"], name="transaction_date_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0005_invoicesummary"),
+        ("transactions", "0002_transaction_transaction_date_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["transaction_type", "transaction_date"],
+                name="transaction_type_date_idx",
+            ),
+        ),
+    ]
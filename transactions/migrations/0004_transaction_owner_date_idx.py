@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoices", "0005_invoicesummary"),
+        ("transactions", "0003_transaction_type_date_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="transaction_date_idx",
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["created_by", "-transaction_date", "id"],
+                name="transaction_owner_date_idx",
+            ),
+        ),
+    ]
@@ -21,3 +21,15 @@ class Transaction(models.Model):
 
     class Meta:
         ordering = ["-transaction_date"]
+        indexes = [
+            # Backs the keyset pagination of a user's transaction list
+            models.Index(
+                fields=["created_by", "-transaction_date", "id"],
+                name="transaction_owner_date_idx",
+            ),
+            # Backs the time-bucketed report
+            models.Index(
+                fields=["transaction_type", "transaction_date"],
+                name="transaction_type_date_idx",
+            ),
+        ]
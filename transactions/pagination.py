@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TransactionCursorPagination(CursorPagination):
+    """Keyset pagination over a user's transactions, newest first.
+
+    The opaque cursor encodes the position in the ``(-transaction_date, id)``
+    ordering, so deep pages cost the same as the first one.
+    """
+
+    ordering = ("-transaction_date", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
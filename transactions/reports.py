@@ -0,0 +1,168 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from .models import Transaction
+
+BUCKETS = {"day": TruncDay, "week": TruncWeek, "month": TruncMonth}
+# Number of periods reported when no start date is given
+DEFAULT_PERIODS = 30
+MAX_PERIODS = 1000
+
+VERSION_KEY = "transactions:report:version"
+
+
+def bucket_start(day, bucket):
+    """Return the first day of the period containing ``day``"""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, bucket):
+    """Return the first day of the period following the one starting at ``start``"""
+    if bucket == "week":
+        return start + timedelta(weeks=1)
+    if bucket == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def count_periods(start, end, bucket):
+    """Return the number of periods from the one containing ``start`` to ``end``"""
+    if bucket == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    days = (bucket_start(end, bucket) - bucket_start(start, bucket)).days
+    return days // (7 if bucket == "week" else 1) + 1
+
+
+def default_start(end, bucket):
+    """Return the start of the period ``DEFAULT_PERIODS - 1`` periods before ``end``"""
+    start = bucket_start(end, bucket)
+    for _ in range(DEFAULT_PERIODS - 1):
+        start = bucket_start(start - timedelta(days=1), bucket)
+    return start
+
+
+def invalidate_report_cache():
+    """Drop every cached period, e.g. after transactions were deleted"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 2, timeout=None)
+
+
+def build_report(queryset, bucket, start, end, cache_prefix):
+    """Sum and count sale and payment transactions per period.
+
+    Periods that ended before the current one never change, so their
+    aggregates are cached and only the periods missing from the cache and
+    the still-open current period are aggregated in the database.
+    """
+    periods = []
+    period = bucket_start(start, bucket)
+    while period <= end:
+        periods.append(period)
+        period = next_bucket(period, bucket)
+
+    current = bucket_start(timezone.localdate(), bucket)
+    version = cache.get_or_set(VERSION_KEY, 1, timeout=None)
+    keys = {
+        period: f"transactions:report:{version}:{cache_prefix}:{bucket}:{period}"
+        for period in periods
+        if period < current
+    }
+    cached = cache.get_many(keys.values())
+    results = {period: cached[key] for period, key in keys.items() if key in cached}
+
+    missing = [period for period in periods if period not in results]
+    if missing:
+        results.update(
+            aggregate_periods(
+                queryset, bucket, missing[0], next_bucket(missing[-1], bucket)
+            )
+        )
+        cache.set_many(
+            {
+                keys[period]: results.get(period, empty_period())
+                for period in missing
+                if period in keys
+            },
+            timeout=settings.TRANSACTION_REPORT_CACHE_TIMEOUT,
+        )
+
+    return [
+        {"period": period.isoformat(), **results.get(period, empty_period())}
+        for period in periods
+    ]
+
+
+def aggregate_periods(queryset, bucket, start, end):
+    """Aggregate transactions in ``[start, end)`` per period in the database"""
+    rows = (
+        queryset.filter(
+            transaction_type__in=[
+                choice for choice, _ in Transaction.TRANSACTION_TYPES
+            ],
+            transaction_date__gte=as_datetime(start),
+            transaction_date__lt=as_datetime(end),
+        )
+        .annotate(period=BUCKETS[bucket]("transaction_date"))
+        .order_by()
+        .values("period", "transaction_type")
+        .annotate(count=Count("id"), amount=Sum("amount"))
+    )
+
+    results = {}
+    for row in rows:
+        period = timezone.localtime(row["period"]).date()
+        results.setdefault(period, empty_period())[row["transaction_type"]] = {
+            "count": row["count"],
+            "amount": format_amount(row["amount"]),
+        }
+    return results
+
+
+def empty_period():
+    return {
+        choice: {"count": 0, "amount": format_amount(0)}
+        for choice, _ in Transaction.TRANSACTION_TYPES
+    }
+
+
+def format_amount(amount):
+    return str(Decimal(amount or 0).quantize(Decimal("0.01")))
+
+
+def as_datetime(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def parse_report_params(params):
+    """Validate the report query parameters into ``(bucket, start, end)``"""
+    bucket = params.get("bucket", "day")
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    try:
+        end = date.fromisoformat(params["end"]) if params.get("end") else None
+        start = date.fromisoformat(params["start"]) if params.get("start") else None
+    except ValueError:
+        raise ValueError("start and end must be ISO 8601 dates")
+    end = end or timezone.localdate()
+    try:
+        start = start or default_start(end, bucket)
+        # The report reads up to the end of the last period, which must exist
+        as_datetime(next_bucket(bucket_start(end, bucket), bucket))
+    except OverflowError:
+        raise ValueError("start and end are out of the supported date range")
+    if start > end:
+        raise ValueError("start must not be after end")
+    # Checked before any period is built, however wide the range
+    if count_periods(start, end, bucket) > MAX_PERIODS:
+        raise ValueError(f"At most {MAX_PERIODS} periods can be reported at once")
+    return bucket, start, end
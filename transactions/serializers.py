@@ -1,10 +1,28 @@
 from rest_framework import serializers
+from invoice_management.metrics import TimedListSerializer, TimedSerializerMixin
+from invoices.models import Invoice
+from invoices.records import datetime_encoder, format_rows
 from .models import Transaction
 
+# The fields of TransactionSerializer, in its order
+TRANSACTION_FIELDS = [
+    "id",
+    "invoice",
+    "transaction_type",
+    "amount",
+    "transaction_date",
+    "status",
+    "created_by",
+]
 
-class TransactionSerializer(serializers.ModelSerializer):
+# Joined in to embed the invoice, as TransactionExpandedSerializer does
+EXPANDED_INVOICE_COLUMNS = ["invoice__reference_number", "invoice__status"]
+
+
+class TransactionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Transaction
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "invoice",
@@ -15,3 +33,65 @@ class TransactionSerializer(serializers.ModelSerializer):
             "created_by",
         ]
         read_only_fields = ["transaction_date"]
+
+
+class TransactionInvoiceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Invoice
+        fields = ["id", "reference_number", "status"]
+
+
+class TransactionExpandedSerializer(TransactionSerializer):
+    """Transaction with its invoice's reference number and status embedded"""
+
+    invoice = TransactionInvoiceSerializer(read_only=True)
+
+
+def transaction_records(rows, fields=TRANSACTION_FIELDS, expand_invoice=False):
+    """Format transaction rows selected with ``TRANSACTION_FIELDS`` as dicts.
+
+    With ``expand_invoice`` the rows must also have the
+    ``EXPANDED_INVOICE_COLUMNS``, and the invoice is embedded.
+    """
+    rows = list(rows)
+    records = format_rows(
+        rows, fields, {"amount": str, "transaction_date": datetime_encoder()}
+    )
+    if expand_invoice and "invoice" in fields:
+        for row, record in zip(rows, records):
+            record["invoice"] = {
+                "id": row["invoice"],
+                "reference_number": row["invoice__reference_number"],
+                "status": row["invoice__status"],
+            }
+    return records
+
+
+class TransactionRowListSerializer(TimedListSerializer):
+    """Formats a page of transaction rows"""
+
+    def to_representation(self, data):
+        return transaction_records(
+            data, self.child.field_names, self.child.expand_invoice
+        )
+
+
+class TransactionRowSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """Read-only ``TransactionSerializer`` output for rows from ``.values()``.
+
+    ``fields`` limits the output to some of the ``TRANSACTION_FIELDS``;
+    ``expand_invoice`` embeds the invoice like ``TransactionExpandedSerializer``.
+    """
+
+    def __init__(
+        self, *args, fields=TRANSACTION_FIELDS, expand_invoice=False, **kwargs
+    ):
+        self.field_names = fields
+        self.expand_invoice = expand_invoice
+        super().__init__(*args, **kwargs)
+
+    class Meta:
+        list_serializer_class = TransactionRowListSerializer
+
+    def to_representation(self, row):
+        return transaction_records([row], self.field_names, self.expand_invoice)[0]
@@ -3,12 +3,23 @@ Tests for the transactions app.
 These tests will run on a test database which is automatically created and destroyed.
 """
 
+import json
+from datetime import date, datetime
+from unittest import mock
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth.models import User
 from django.db import IntegrityError
 from django.utils import timezone as django_timezone
+from rest_framework.test import APITestCase
 from invoices.models import Invoice
+from transactions import reports
 from transactions.models import Transaction
+from transactions.serializers import (
+    TransactionExpandedSerializer,
+    TransactionSerializer,
+)
+from invoice_management.testing import QueryBudgetMixin, query_budget
 
 
 class TransactionModelTest(TestCase):
@@ -203,3 +214,477 @@ class TransactionModelTest(TestCase):
         # This might pass at the Python level but fail at DB level
         # depending on database constraints
         transaction.save()
+
+
+class TransactionPaginationTest(APITestCase):
+    """Test cases for cursor pagination of the transaction list"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference_number="INV-001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            total_amount=100.00,
+            created_by=self.user,
+        )
+        for _ in range(3):
+            Transaction.objects.create(
+                invoice=self.invoice,
+                transaction_type="sale",
+                amount=100.00,
+                created_by=self.user,
+            )
+
+    def test_transaction_list_is_paginated(self):
+        """Test that the transaction list returns cursor pages"""
+        response = self.client.get("/api/transactions/?page_size=2")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["results"]), 2)
+        self.assertIsNotNone(data["next"])
+
+        response = self.client.get(data["next"])
+        data = response.json()
+        self.assertEqual(len(data["results"]), 1)
+        self.assertIsNone(data["next"])
+
+
+class TransactionReportTest(APITestCase):
+    """Test cases for the time-bucketed transaction report"""
+
+    def setUp(self):
+        """Set up test data"""
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference_number="INV-001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            total_amount=100.00,
+            created_by=self.user,
+        )
+        for day, transaction_type, amount in (
+            (1, "sale", 100.00),
+            (1, "sale", 50.00),
+            (2, "payment", 100.00),
+            (20, "sale", 10.00),
+        ):
+            self.create_transaction(day, transaction_type, amount)
+
+    def create_transaction(self, day, transaction_type, amount):
+        """Create a transaction dated on the given day of January 2025"""
+        transaction = Transaction.objects.create(
+            invoice=self.invoice,
+            transaction_type=transaction_type,
+            amount=amount,
+            created_by=self.user,
+        )
+        # transaction_date is set on creation, so backdate it afterwards
+        Transaction.objects.filter(pk=transaction.pk).update(
+            transaction_date=django_timezone.make_aware(datetime(2025, 1, day, 12))
+        )
+        return transaction
+
+    def test_daily_report(self):
+        """Test sums and counts bucketed by day"""
+        response = self.client.get(
+            "/api/transactions/report/?bucket=day&start=2025-01-01&end=2025-01-03"
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(
+            [row["period"] for row in results],
+            [
+                "2025-01-01",
+                "2025-01-02",
+                "2025-01-03",
+            ],
+        )
+        self.assertEqual(results[0]["sale"], {"count": 2, "amount": "150.00"})
+        self.assertEqual(results[0]["payment"], {"count": 0, "amount": "0.00"})
+        self.assertEqual(results[1]["payment"], {"count": 1, "amount": "100.00"})
+        self.assertEqual(results[2]["sale"], {"count": 0, "amount": "0.00"})
+
+    def test_weekly_and_monthly_report(self):
+        """Test sums bucketed by week and month"""
+        response = self.client.get(
+            "/api/transactions/report/?bucket=week&start=2025-01-01&end=2025-01-31"
+        )
+        results = response.json()["results"]
+        self.assertEqual(results[0]["period"], "2024-12-30")
+        self.assertEqual(results[0]["sale"], {"count": 2, "amount": "150.00"})
+        self.assertEqual(results[3]["sale"], {"count": 1, "amount": "10.00"})
+
+        response = self.client.get(
+            "/api/transactions/report/?bucket=month&start=2025-01-01&end=2025-02-28"
+        )
+        results = response.json()["results"]
+        self.assertEqual(
+            [row["period"] for row in results], ["2025-01-01", "2025-02-01"]
+        )
+        self.assertEqual(results[0]["sale"], {"count": 3, "amount": "160.00"})
+        self.assertEqual(results[1]["sale"], {"count": 0, "amount": "0.00"})
+
+    def test_closed_periods_are_cached(self):
+        """Test that closed periods are served from the cache"""
+        url = "/api/transactions/report/?bucket=month&start=2025-01-01&end=2025-01-31"
+        first = self.client.get(url).json()
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url).json()
+        self.assertEqual(first, second)
+
+    def test_deleting_an_invoice_invalidates_the_cache(self):
+        """Test that deleting an invoice drops the cached periods"""
+        url = "/api/transactions/report/?bucket=month&start=2025-01-01&end=2025-01-31"
+        self.client.get(url)
+
+        response = self.client.delete(f"/api/invoices/{self.invoice.pk}/")
+        self.assertEqual(response.status_code, 204)
+
+        results = self.client.get(url).json()["results"]
+        self.assertEqual(results[0]["sale"], {"count": 0, "amount": "0.00"})
+
+    def test_current_period_is_always_recomputed(self):
+        """Test that the open period is not served from the cache"""
+        today = django_timezone.localdate()
+        url = f"/api/transactions/report/?bucket=day&start={today}&end={today}"
+        self.assertEqual(self.client.get(url).json()["results"][0]["sale"]["count"], 0)
+
+        Transaction.objects.create(
+            invoice=self.invoice,
+            transaction_type="sale",
+            amount=10.00,
+            created_by=self.user,
+        )
+        self.assertEqual(self.client.get(url).json()["results"][0]["sale"]["count"], 1)
+
+    def test_invalid_parameters_are_rejected(self):
+        """Test that invalid buckets and ranges return a 400"""
+        for query in (
+            "bucket=year",
+            "start=yesterday",
+            "start=2025-02-01&end=2025-01-01",
+            "bucket=day&start=2000-01-01&end=2025-01-01",
+            "bucket=day&start=9999-12-01&end=9999-12-31",
+            "bucket=month&start=9999-11-01&end=9999-12-31",
+            "bucket=week&end=0001-01-01",
+        ):
+            response = self.client.get(f"/api/transactions/report/?{query}")
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_wide_ranges_are_rejected_without_building_periods(self):
+        """Test that the period limit is checked before the periods are built"""
+        with mock.patch(
+            "transactions.reports.next_bucket", wraps=reports.next_bucket
+        ) as next_bucket:
+            response = self.client.get(
+                "/api/transactions/report/?bucket=day&start=0001-01-01&end=9999-12-30"
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("At most 1000 periods", response.json()["error"])
+        self.assertLessEqual(next_bucket.call_count, 1)
+
+    def test_period_counts(self):
+        """Test that periods are counted from the one containing start"""
+        for bucket, start, end, count in (
+            ("day", date(2025, 1, 1), date(2025, 1, 31), 31),
+            ("week", date(2025, 1, 5), date(2025, 1, 6), 2),
+            ("month", date(2024, 12, 31), date(2025, 2, 1), 3),
+        ):
+            self.assertEqual(reports.count_periods(start, end, bucket), count)
+
+
+class UserTransactionAccessTest(APITestCase):
+    """Test cases for scoping transactions to the current user"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user1 = User.objects.create_user(
+            username="testuser1", email="test1@example.com", password="testpass123"
+        )
+        self.user2 = User.objects.create_user(
+            username="testuser2", email="test2@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user1)
+        self.transactions = {}
+        for user in (self.user1, self.user2):
+            invoice = Invoice.objects.create(
+                reference_number=f"INV-{user.username}",
+                customer_name="Test Customer",
+                customer_email="customer@example.com",
+                total_amount=100.00,
+                created_by=user,
+            )
+            self.transactions[user] = Transaction.objects.create(
+                invoice=invoice,
+                transaction_type="sale",
+                amount=100.00,
+                created_by=user,
+            )
+
+    def test_user_can_only_see_their_own_transactions(self):
+        """Test that the list and detail views only return the user's rows"""
+        response = self.client.get("/api/transactions/")
+        results = response.json()["results"]
+        self.assertEqual(
+            [transaction["id"] for transaction in results],
+            [self.transactions[self.user1].pk],
+        )
+
+        response = self.client.get(
+            f"/api/transactions/{self.transactions[self.user2].pk}/"
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_report_only_counts_the_users_transactions(self):
+        """Test that the report is scoped to the current user"""
+        cache.clear()
+        today = django_timezone.localdate()
+        response = self.client.get(
+            f"/api/transactions/report/?start={today}&end={today}"
+        )
+        self.assertEqual(
+            response.json()["results"][0]["sale"], {"count": 1, "amount": "100.00"}
+        )
+
+    def test_expanded_invoice_is_joined(self):
+        """Test that expanding the invoice does not add a query per row"""
+        invoice = self.transactions[self.user1].invoice
+        for _ in range(5):
+            Transaction.objects.create(
+                invoice=Invoice.objects.create(
+                    reference_number=f"INV-{Transaction.objects.count()}",
+                    customer_name="Test Customer",
+                    customer_email="customer@example.com",
+                    created_by=self.user1,
+                ),
+                transaction_type="sale",
+                amount=10.00,
+                created_by=self.user1,
+            )
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/transactions/?expand=invoice")
+        results = response.json()["results"]
+        self.assertEqual(len(results), 6)
+        self.assertEqual(
+            results[-1]["invoice"],
+            {
+                "id": invoice.pk,
+                "reference_number": invoice.reference_number,
+                "status": "pending",
+            },
+        )
+
+
+class TransactionExportTest(APITestCase):
+    """Test cases for streaming transaction exports"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference_number="INV-001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            total_amount=100.00,
+            created_by=self.user,
+        )
+        for transaction_type in ("sale", "payment"):
+            Transaction.objects.create(
+                invoice=self.invoice,
+                transaction_type=transaction_type,
+                amount=100.00,
+                created_by=self.user,
+            )
+
+    def test_csv_export(self):
+        """Test exporting transactions as CSV"""
+        response = self.client.get("/api/transactions/export/?format=csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines[0].split(",")[:3], ["id", "invoice_id", "invoice_reference_number"]
+        )
+        self.assertEqual(len(lines), 3)
+        self.assertIn("INV-001,sale,100.00", lines[1])
+
+    def test_ndjson_export(self):
+        """Test exporting transactions as NDJSON"""
+        response = self.client.get("/api/transactions/export/?format=ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [record["transaction_type"] for record in records], ["sale", "payment"]
+        )
+        self.assertEqual(records[0]["amount"], "100.00")
+
+
+class AsyncTransactionViewsTest(APITestCase):
+    """Test cases for the async transaction endpoints"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoice = Invoice.objects.create(
+            reference_number="INV-001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            total_amount=100.00,
+            created_by=self.user,
+        )
+        self.transaction = Transaction.objects.create(
+            invoice=self.invoice,
+            transaction_type="sale",
+            amount=100.00,
+            created_by=self.user,
+        )
+
+    def test_list_and_detail_match_sync_views(self):
+        """Test that the async views return what the sync views return"""
+        for path in ["", f"{self.transaction.pk}/", "?expand=invoice"]:
+            response = self.client.get(f"/api/async/transactions/{path}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response.json(), self.client.get(f"/api/transactions/{path}").json()
+            )
+
+
+class TransactionQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """Test cases for the query budget of every transaction endpoint"""
+
+    urlconf = "transactions.urls"
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.invoices = []
+
+    def populate(self, size):
+        """Add invoices with ``size`` transactions each, up to ``size`` invoices"""
+        while len(self.invoices) < size:
+            invoice = Invoice.objects.create(
+                reference_number=f"INV-{len(self.invoices):03d}",
+                customer_name="Test Customer",
+                customer_email="customer@example.com",
+                total_amount=100.00,
+                created_by=self.user,
+            )
+            for i in range(size):
+                self.transaction = Transaction.objects.create(
+                    invoice=invoice,
+                    transaction_type="sale" if i == 0 else "payment",
+                    amount=100.00,
+                    created_by=self.user,
+                )
+            self.invoices.append(invoice)
+
+    @query_budget("transaction-list", queries=1, db_time=0.5)
+    def test_list(self, size):
+        """Test the query budget of listing transactions"""
+        return self.client.get("/api/transactions/", {"expand": "invoice"})
+
+    @query_budget("transaction-export", queries=1, db_time=0.5)
+    def test_export(self, size):
+        """Test the query budget of exporting transactions"""
+        return self.client.get("/api/transactions/export/", {"format": "csv"})
+
+    @query_budget("transaction-report", queries=1, db_time=0.5)
+    def test_report(self, size):
+        """Test the query budget of the transaction report"""
+        return self.client.get("/api/transactions/report/")
+
+    @query_budget("transaction-detail", queries=1, db_time=0.5)
+    def test_retrieve(self, size):
+        """Test the query budget of retrieving a transaction"""
+        return self.client.get(
+            f"/api/transactions/{self.transaction.pk}/", {"expand": "invoice"}
+        )
+
+
+class TransactionRowSerializerTest(APITestCase):
+    """Test cases for listing transactions from plain rows"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.client.force_authenticate(user=self.user)
+        invoice = Invoice.objects.create(
+            reference_number="INV-001",
+            customer_name="Test Customer",
+            customer_email="customer@example.com",
+            total_amount=100.00,
+            created_by=self.user,
+        )
+        for transaction_type in ("sale", "payment"):
+            Transaction.objects.create(
+                invoice=invoice,
+                transaction_type=transaction_type,
+                amount=100.00,
+                created_by=self.user,
+            )
+
+    def test_rows_serialize_like_the_model_serializers(self):
+        """Test that list and detail match the model serializers, expanded or not"""
+        transactions = Transaction.objects.filter(created_by=self.user)
+        for params, serializer_class in (
+            ({}, TransactionSerializer),
+            ({"expand": "invoice"}, TransactionExpandedSerializer),
+        ):
+            response = self.client.get("/api/transactions/", params)
+            expected = serializer_class(
+                transactions.order_by("-transaction_date", "id"), many=True
+            ).data
+            self.assertEqual(
+                response.json()["results"], json.loads(json.dumps(expected))
+            )
+
+            transaction = transactions.first()
+            response = self.client.get(f"/api/transactions/{transaction.pk}/", params)
+            self.assertEqual(
+                response.json(),
+                json.loads(json.dumps(serializer_class(transaction).data)),
+            )
+
+    def test_sparse_fields(self):
+        """Test that ?fields= limits the fields of each transaction"""
+        response = self.client.get(
+            "/api/transactions/",
+            {"fields": "invoice,amount", "expand": "invoice"},
+        )
+        self.assertEqual(
+            response.json()["results"][0],
+            {
+                "invoice": {
+                    "id": Invoice.objects.get().pk,
+                    "reference_number": "INV-001",
+                    "status": "pending",
+                },
+                "amount": "100.00",
+            },
+        )
+
+        response = self.client.get("/api/transactions/", {"fields": "id,notes"})
+        self.assertEqual(response.status_code, 400)
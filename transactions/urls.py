@@ -3,5 +3,7 @@ from . import views
 
 urlpatterns = [
     path("", views.TransactionListView.as_view(), name="transaction-list"),
+    path("export/", views.TransactionExportView.as_view(), name="transaction-export"),
+    path("report/", views.TransactionReportView.as_view(), name="transaction-report"),
     path("<int:pk>/", views.TransactionDetailView.as_view(), name="transaction-detail"),
 ]
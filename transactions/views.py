@@ -1,21 +1,150 @@
+from django.db.models import F
 from django.shortcuts import render
-from rest_framework import generics
+from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from invoices.exports import (
+    EXPORT_CHUNK_SIZE,
+    CSVRenderer,
+    NDJSONRenderer,
+    stream_export,
+)
+from invoices.records import datetime_encoder, parse_fields
 from .models import Transaction
-from .serializers import TransactionSerializer
+from .pagination import TransactionCursorPagination
+from .reports import build_report, parse_report_params
+from .serializers import (
+    EXPANDED_INVOICE_COLUMNS,
+    TRANSACTION_FIELDS,
+    TransactionExpandedSerializer,
+    TransactionRowSerializer,
+    TransactionSerializer,
+)
 
 
-class TransactionListView(generics.ListAPIView):
-    serializer_class = TransactionSerializer
-    permission_classes = [IsAuthenticated]
+class TransactionQuerysetMixin:
+    """Scope transactions to the current user, optionally embedding invoices.
+
+    Transactions are read as ``.values()`` rows and formatted by
+    ``TransactionRowSerializer``. ``?fields=`` limits the output to some of
+    the transaction fields.
+    """
+
+    def expand_invoice(self):
+        return self.request.query_params.get("expand") == "invoice"
 
     def get_queryset(self):
-        return Transaction.objects.all()
+        # Return only transactions created by the current user
+        queryset = Transaction.objects.filter(created_by=self.request.user)
+        columns = TRANSACTION_FIELDS
+        if self.expand_invoice():
+            # Join the invoice instead of fetching it once per transaction
+            columns = columns + EXPANDED_INVOICE_COLUMNS
+        return queryset.values(*columns)
+
+    def reads_rows(self):
+        # Schema generation describes the rows with the model serializers
+        return not getattr(self, "swagger_fake_view", False)
+
+    def get_serializer_class(self):
+        if self.reads_rows():
+            return TransactionRowSerializer
+        if self.expand_invoice():
+            return TransactionExpandedSerializer
+        return TransactionSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        if self.reads_rows():
+            kwargs["fields"] = parse_fields(
+                self.request.query_params, TRANSACTION_FIELDS
+            )
+            kwargs["expand_invoice"] = self.expand_invoice()
+        return super().get_serializer(*args, **kwargs)
 
 
-class TransactionDetailView(generics.RetrieveAPIView):
-    serializer_class = TransactionSerializer
+class TransactionListView(TransactionQuerysetMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = TransactionCursorPagination
 
-    def get_queryset(self):
-        return Transaction.objects.all()
+
+class TransactionDetailView(TransactionQuerysetMixin, generics.RetrieveAPIView):
+    permission_classes = [IsAuthenticated]
+
+
+class TransactionReportView(APIView):
+    """Sale and payment sums and counts per day, week or month"""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            bucket, start, end = parse_report_params(request.query_params)
+            results = build_report(
+                Transaction.objects.filter(created_by=request.user),
+                bucket,
+                start,
+                end,
+                cache_prefix=f"user:{request.user.pk}",
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {
+                "bucket": bucket,
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "results": results,
+            }
+        )
+
+
+class TransactionExportView(APIView):
+    """Stream the current user's transactions as CSV or NDJSON.
+
+    Choose the format with ``?format=csv`` (default) or ``?format=ndjson``,
+    or the Accept header.
+    """
+
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+    csv_header = [
+        "id",
+        "invoice_id",
+        "invoice_reference_number",
+        "transaction_type",
+        "amount",
+        "transaction_date",
+        "status",
+    ]
+
+    def get(self, request):
+        rows = (
+            Transaction.objects.filter(created_by=request.user)
+            .order_by("id")
+            .values(
+                *self.csv_header[:2],
+                *self.csv_header[3:],
+                invoice_reference_number=F("invoice__reference_number"),
+            )
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        encode_datetime = datetime_encoder()
+
+        def records():
+            for row in rows:
+                row["amount"] = str(row["amount"])
+                row["transaction_date"] = encode_datetime(row["transaction_date"])
+                yield {column: row[column] for column in self.csv_header}
+
+        def csv_rows():
+            for record in records():
+                yield list(record.values())
+
+        return stream_export(
+            request.accepted_renderer,
+            "transactions",
+            self.csv_header,
+            csv_rows,
+            records,
+        )